@@ -0,0 +1,262 @@
+"""
+Strategies for choosing the color limits of a stream of image frames.
+
+Each estimator has an ``update(arr)`` method, which takes a new frame and
+returns the ``(vmin, vmax)`` to display it with, or None to leave the color
+limits as they are. Estimators other than 'expand' look at a strided
+subsample of each frame, of at most ``max_samples`` pixels, so their cost
+does not grow with the frame size.
+"""
+import collections
+
+import numpy
+
+
+def strided_sample(arr, max_samples):
+    """
+    Take a regular subsample of an array, dropping non-finite values.
+
+    Parameters
+    ----------
+    arr : array
+    max_samples : int
+        The sample has roughly this many values at most.
+
+    Returns
+    -------
+    sample : 1-D array
+    """
+    arr = numpy.asarray(arr)
+    if arr.size > max_samples:
+        # Stride equally along every axis.
+        stride = int(numpy.ceil((arr.size / max_samples) ** (1 / arr.ndim)))
+        arr = arr[(slice(None, None, stride),) * arr.ndim]
+    sample = arr.ravel()
+    if sample.dtype.kind == 'f':
+        sample = sample[numpy.isfinite(sample)]
+    return sample
+
+
+class ExpandingClim:
+    """
+    Widen the limits to the min and max of every frame so far.
+
+    This reads every pixel of every frame.
+    """
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self._limits = None
+
+    def update(self, arr):
+        arr = numpy.asarray(arr)
+        if arr.dtype.kind == 'f':
+            if not numpy.isfinite(arr).any():
+                return self._limits
+            vmin, vmax = numpy.nanmin(arr), numpy.nanmax(arr)
+        elif arr.size:
+            vmin, vmax = arr.min(), arr.max()
+        else:
+            return self._limits
+        if self._limits is not None:
+            vmin, vmax = min(self._limits[0], vmin), max(self._limits[1], vmax)
+        self._limits = (vmin, vmax)
+        return self._limits
+
+
+class PercentileClim:
+    """
+    Use percentiles of each new frame on its own.
+
+    Parameters
+    ----------
+    low, high : float, optional
+        Percentiles, between 0 and 100. Default is 1 and 99.
+    max_samples : int, optional
+        Default is 65536.
+    """
+    def __init__(self, low=1, high=99, max_samples=65536):
+        self.low = low
+        self.high = high
+        self.max_samples = max_samples
+
+    def reset(self):
+        pass
+
+    def update(self, arr):
+        sample = strided_sample(arr, self.max_samples)
+        if not len(sample):
+            return None
+        return tuple(numpy.percentile(sample, [self.low, self.high]))
+
+
+class DecayingHistogramClim:
+    """
+    Use percentiles of a histogram of all frames, giving older frames less weight.
+
+    The counts from earlier frames are multiplied by ``decay`` each time a new
+    frame is added, so the limits follow changes in the signal level within
+    a few frames while smoothing out frame-to-frame noise. The bins span the
+    ``low`` to ``high`` percentile range of each new frame, widened by half
+    of itself on either side, with values beyond counted in the end bins, so
+    outliers do not coarsen the histogram. The range grows to take in new
+    frames and shrinks once the counts at its edges have decayed away.
+
+    Parameters
+    ----------
+    low, high : float, optional
+        Percentiles, between 0 and 100. Default is 1 and 99.
+    decay : float, optional
+        Between 0 (only the latest frame counts) and 1 (no decay). Default is
+        0.5.
+    bins : int, optional
+        Default is 256.
+    max_samples : int, optional
+        Default is 65536.
+    """
+    # Bins holding less than this fraction of the total are dropped from the
+    # range when it is recomputed.
+    _negligible = 1e-4
+    # Margin added to either side of a frame's percentile range, as a
+    # fraction of that range
+    _margin = 0.5
+
+    def __init__(self, low=1, high=99, decay=0.5, bins=256, max_samples=65536):
+        self.low = low
+        self.high = high
+        self.decay = decay
+        self.bins = bins
+        self.max_samples = max_samples
+        self.reset()
+
+    def reset(self):
+        self._edges = None
+        self._counts = None
+
+    def update(self, arr):
+        sample = strided_sample(arr, self.max_samples)
+        if not len(sample):
+            return self._limits()
+        lo, hi = numpy.percentile(sample, [self.low, self.high])
+        margin = (hi - lo) * self._margin
+        lo, hi = lo - margin, hi + margin
+        if self._counts is None:
+            self._edges = self._make_edges(lo, hi)
+            self._counts = numpy.zeros(self.bins)
+        else:
+            self._counts *= self.decay
+            significant, = numpy.nonzero(self._counts > self._counts.sum() * self._negligible)
+            if len(significant):
+                lo = min(lo, self._edges[significant[0]])
+                hi = max(hi, self._edges[significant[-1] + 1])
+            if lo != self._edges[0] or hi != self._edges[-1]:
+                # Move the old counts, by their bin centers, into new bins.
+                edges = self._make_edges(lo, hi)
+                centers = (self._edges[:-1] + self._edges[1:]) / 2
+                self._counts, _ = numpy.histogram(centers, edges, weights=self._counts)
+                self._edges = edges
+        sample = numpy.clip(sample, self._edges[0], self._edges[-1])
+        self._counts += numpy.histogram(sample, self._edges)[0]
+        return self._limits()
+
+    def _make_edges(self, lo, hi):
+        if hi <= lo:
+            hi = lo + max(abs(lo) * 1e-6, 1e-12)
+        return numpy.linspace(lo, hi, self.bins + 1)
+
+    def _limits(self):
+        if self._counts is None:
+            return None
+        cumulative = numpy.concatenate([[0], numpy.cumsum(self._counts)])
+        total = cumulative[-1]
+        if not total:
+            return None
+        return tuple(numpy.interp(numpy.array([self.low, self.high]) / 100 * total,
+                                  cumulative, self._edges))
+
+
+class WindowClim:
+    """
+    Use percentiles of the most recent frames, equally weighted.
+
+    Parameters
+    ----------
+    low, high : float, optional
+        Percentiles, between 0 and 100. Default is 1 and 99.
+    window : int, optional
+        Number of frames. Default is 10.
+    max_samples : int, optional
+        Total over all the frames in the window. Default is 65536.
+    """
+    def __init__(self, low=1, high=99, window=10, max_samples=65536):
+        self.low = low
+        self.high = high
+        self.window = window
+        self.max_samples = max_samples
+        self.reset()
+
+    def reset(self):
+        self._samples = collections.deque(maxlen=self.window)
+
+    def update(self, arr):
+        sample = strided_sample(arr, max(self.max_samples // self.window, 1))
+        if len(sample):
+            self._samples.append(sample)
+        if not self._samples:
+            return None
+        return tuple(numpy.percentile(numpy.concatenate(self._samples),
+                                      [self.low, self.high]))
+
+
+class FixedClim:
+    """
+    Use fixed limits.
+
+    Parameters
+    ----------
+    vmin, vmax : float, optional
+        If both are None (default), keep whatever limits the image has, such
+        as those set by passing vmin and vmax to imshow.
+    """
+    def __init__(self, vmin=None, vmax=None):
+        if (vmin is None) != (vmax is None):
+            raise ValueError("Give both vmin and vmax, or neither.")
+        self.vmin = vmin
+        self.vmax = vmax
+
+    def reset(self):
+        pass
+
+    def update(self, arr):
+        if self.vmin is None and self.vmax is None:
+            return None
+        return (self.vmin, self.vmax)
+
+
+CLIM_STRATEGIES = {
+    'expand': ExpandingClim,
+    'percentile': PercentileClim,
+    'decaying_histogram': DecayingHistogramClim,
+    'window': WindowClim,
+    'fixed': FixedClim,
+}
+
+
+def make_clim_estimator(strategy='expand', **options):
+    """
+    Create a color limit estimator.
+
+    Parameters
+    ----------
+    strategy : {'expand', 'percentile', 'decaying_histogram', 'window', 'fixed'}
+        Default is 'expand'.
+    **options
+        Passed to the estimator's class
+    """
+    try:
+        cls = CLIM_STRATEGIES[strategy]
+    except KeyError:
+        raise ValueError(f"strategy must be one of {tuple(CLIM_STRATEGIES)}, "
+                         f"not {strategy!r}") from None
+    return cls(**options)
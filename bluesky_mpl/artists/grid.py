@@ -2,6 +2,10 @@ from event_model import DocumentRouter
 import matplotlib.pyplot as plt
 import numpy
 
+from .render import FigureRenderer
+
+ACCUMULATE_MODES = ('sum', 'mean', 'count')
+
 
 class Grid(DocumentRouter):
     """
@@ -18,26 +22,71 @@ class Grid(DocumentRouter):
     Parameters
     ----------
     func : callable
-        This must accept a BulkEvent and return three lists of floats (x
+        This must accept a BulkEvent and return three lists or arrays (x
         grid co-ordinates, y grid co-ordinates and grid position intensity
-        values). The three lists must contain an equal number of items, but
+        values). The three must contain an equal number of items, but
         that number is arbitrary. That is, a given document may add one new
         point, no new points or multiple new points to the plot.
     shape : tuple
         The (row, col) shape of the grid.
     ax : matplotlib Axes, optional.
         if ``None``, a new Figure and Axes are created.
+    dtype : numpy dtype, optional
+        The dtype of the grid. Default is float64. Use float32 to halve the
+        memory used by large maps. Cells not yet visited are NaN for floating
+        point dtypes and 0 otherwise. With an integer dtype, values that are
+        not whole numbers raise ValueError rather than being truncated
+        (except with accumulate='count', which ignores the values).
+    accumulate : {None, 'sum', 'mean', 'count'}, optional
+        How to combine repeated visits to the same cell. By default, a new
+        value overwrites the old one. Otherwise, the cell shows the sum or
+        mean of all the values it has received, or the number of visits.
+        'mean' needs a floating point dtype; its running sums are kept in
+        float64 whatever the dtype.
     **kwargs
         Passed through to :meth:`Axes.imshow` to style the AxesImage object.
     """
-    def __init__(self, func, shape, *, ax=None, **kwargs):
+    def __init__(self, func, shape, *, ax=None, dtype=float, accumulate=None, **kwargs):
+        if accumulate not in (None,) + ACCUMULATE_MODES:
+            raise ValueError(f"accumulate must be None or one of {ACCUMULATE_MODES}, "
+                             f"not {accumulate!r}")
         self.func = func
-        self.shape = shape
+        self.shape = tuple(shape)
+        self.accumulate = accumulate
         if ax is None:
             _, ax = plt.subplots()
         self.ax = ax
-        self.grid_data = numpy.full(self.shape, numpy.nan)
-        self.image, = ax.imshow(self.grid_data, **kwargs)
+        dtype = numpy.dtype(dtype)
+        if accumulate == 'mean' and not numpy.issubdtype(dtype, numpy.floating):
+            raise ValueError(f"accumulate='mean' needs a floating point dtype, "
+                             f"not {dtype}, or the means would be truncated")
+        fill_value = numpy.nan if numpy.issubdtype(dtype, numpy.floating) else 0
+        self.grid_data = numpy.full(self.shape, fill_value, dtype=dtype)
+        # Running totals for accumulate modes, updated in place.
+        self._sums = None
+        self._counts = None
+        if accumulate == 'sum':
+            self._sums = numpy.zeros(self.shape, dtype=dtype)
+        elif accumulate == 'mean':
+            self._sums = numpy.zeros(self.shape, dtype=numpy.float64)
+        if accumulate in ('mean', 'count'):
+            self._counts = numpy.zeros(self.shape, dtype=numpy.uint32)
+        if len(self.ax.images) == 1:
+            # Reuse the image left by a previous run.
+            self.image, = self.ax.images
+            self.image.set_data(self.grid_data)
+            if 'extent' in kwargs:
+                self.image.set_extent(kwargs['extent'])
+        elif len(self.ax.images) == 0:
+            self.image = ax.imshow(self.grid_data, **kwargs)
+            self.ax.figure.colorbar(self.image, ax=self.ax)
+        else:
+            raise ValueError(f"Expected ax to be an axis with no image "
+                             f"artists or one image artist. Found "
+                             f"ax.images={self.ax.images}")
+        # Running color limits, widened from the new values only.
+        self._clim = None
+        self._renderer = FigureRenderer.for_figure(self.ax.figure)
 
     def event_page(self, doc):
         '''
@@ -52,25 +101,45 @@ class Grid(DocumentRouter):
 
         Returns
         -------
-        x_coords, y_coords, I_vals : Lists
-            These are lists of x co-ordinate, y co-ordinate and intensity
-            values arising from the bulk event.
+        x_coords, y_coords, I_vals : Lists or arrays
+            These are x co-ordinates, y co-ordinates and intensity values
+            arising from the bulk event.
+        '''
+        self.apply_event_page(self.compute_event_page(doc))
+
+    def compute_event_page(self, doc):
+        '''
+        Extract the new data from an EventPage.
+
+        This is the "compute" phase of :meth:`event_page`. It does not touch
+        matplotlib, so it may be run on a worker thread.
         '''
-        x_coords, y_coords, I_vals = self.func(doc)
+        return self.func(doc)
+
+    def apply_event_page(self, result):
+        '''
+        Update the plot with the result of :meth:`compute_event_page`.
+
+        This is the "apply" phase of :meth:`event_page`. It must be run on the
+        thread that owns the Figure.
+        '''
+        x_coords, y_coords, I_vals = result
         self._update(x_coords, y_coords, I_vals)
 
     def _update(self, x_coords, y_coords, I_vals):
         '''
-        Updates self.grid_data with the values from the lists x_coords,
-        y_coords, I_vals.
+        Updates self.grid_data with the values from x_coords, y_coords,
+        I_vals, applied as a single vectorized scatter.
 
         Parameters
         ----------
-        x_coords, y_coords, I_vals : Lists
-            These are lists of x co-ordinate, y co-ordinate and intensity
-            values arising from the event. The length of all three lists must
-            be the same.
+        x_coords, y_coords, I_vals : Lists or arrays
+            These are x co-ordinates, y co-ordinates and intensity values
+            arising from the event. The length of all three must be the same.
         '''
+        x_coords = numpy.asarray(x_coords, dtype=numpy.intp).ravel()
+        y_coords = numpy.asarray(y_coords, dtype=numpy.intp).ravel()
+        I_vals = numpy.asarray(I_vals).ravel()
 
         if not len(x_coords) == len(y_coords) == len(I_vals):
             raise ValueError("User function is expected to provide the same "
@@ -79,10 +148,39 @@ class Grid(DocumentRouter):
                              "".format(len(x_coords), len(y_coords),
                                        len(I_vals)))
 
-        if not x_coords:
+        if not len(x_coords):
             # No new data, Short-circuit.
             return
 
+        if (self.grid_data.dtype.kind in 'iu' and self.accumulate != 'count'
+                and I_vals.dtype.kind not in 'biu'):
+            if not numpy.array_equal(I_vals, numpy.trunc(I_vals)):
+                raise ValueError(f"The grid has the integer dtype {self.grid_data.dtype}, "
+                                 f"but received values that are not whole numbers.")
+
         # Update grid_data and the plot.
-        self.grid_data[x_coords, y_coords] = I_vals
+        cells = (x_coords, y_coords)
+        if self.accumulate is None:
+            self.grid_data[cells] = I_vals
+        else:
+            # numpy.add.at, unlike +=, handles cells repeated within the batch.
+            if self._sums is not None:
+                numpy.add.at(self._sums, cells, I_vals)
+            if self._counts is not None:
+                numpy.add.at(self._counts, cells, 1)
+            if self.accumulate == 'sum':
+                self.grid_data[cells] = self._sums[cells]
+            elif self.accumulate == 'count':
+                self.grid_data[cells] = self._counts[cells]
+            else:
+                self.grid_data[cells] = self._sums[cells] / self._counts[cells]
         self.image.set_array(self.grid_data)
+        new_values = self.grid_data[cells]
+        new_values = new_values[numpy.isfinite(new_values)]
+        if len(new_values):
+            low, high = new_values.min(), new_values.max()
+            if self._clim is not None:
+                low, high = min(low, self._clim[0]), max(high, self._clim[1])
+            self._clim = (low, high)
+            self.image.set_clim(*self._clim)
+        self._renderer.request_draw()
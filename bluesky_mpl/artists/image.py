@@ -1,10 +1,22 @@
 import logging
+import weakref
+
 from event_model import DocumentRouter
 import numpy
 
+from .clim import make_clim_estimator
+from .render import FigureRenderer
+from .utils import image_pyramid
 
 log = logging.getLogger(__name__)
 
+# For each AxesImage that may be showing a cropped, downsampled frame: the
+# full-resolution frame shape, its extent and whether that extent was given
+# explicitly (rather than following the shape), as a list; and the Image that
+# last updated it
+_full_extents = weakref.WeakKeyDictionary()
+_image_owners = weakref.WeakKeyDictionary()
+
 
 class Image(DocumentRouter):
     """
@@ -23,10 +35,39 @@ class Image(DocumentRouter):
         given, this argument will be ignored.
     ax : matplotlib Axes, optional
         If None, a new Figure and Axes are created.
+    blit : boolean, optional
+        If True, redraw only the image on top of a cached background when a
+        new frame arrives, and redraw the whole Figure (including the
+        colorbar) only when the color limits change. Default is False.
+    lod : boolean, optional
+        If True, build a pyramid of successively halved copies of each frame
+        (see :func:`~bluesky_mpl.artists.utils.image_pyramid`) and give
+        matplotlib only the visible part of the coarsest level that still has
+        at least one pixel per screen pixel. Zooming, panning and resizing
+        switch levels. Autoscaling of the Axes is turned off. The
+        full-resolution frame is still available as :attr:`frame`. Default is
+        False.
+    lod_min_size : int, optional
+        Size of the coarsest level of the pyramid. Default is 256.
+    clim_strategy : str or object, optional
+        How to choose the color limits for each frame: one of 'expand' (the
+        min and max of all frames so far), 'percentile', 'decaying_histogram',
+        'window' or 'fixed' (see :mod:`bluesky_mpl.artists.clim`), or an
+        object with an ``update(arr)`` method returning ``(vmin, vmax)`` or
+        None. Default is 'expand'.
+    clim_options : dict, optional
+        Passed to the estimator for ``clim_strategy``
+    clim_tolerance : float, optional
+        Ignore changes to the color limits smaller than this fraction of the
+        current range. With blitting, each change costs a full redraw (for the
+        colorbar), so a small tolerance such as 0.02 makes fluctuating
+        estimates much cheaper. Default is 0.
     **kwargs
         Passed through to :meth:`Axes.plot` to style Line object.
     """
-    def __init__(self, func, shape, *, label_template='{scan_id} [{uid:.8}]', ax=None, **kwargs):
+    def __init__(self, func, shape, *, label_template='{scan_id} [{uid:.8}]', ax=None,
+                 blit=False, lod=False, lod_min_size=256, clim_strategy='expand',
+                 clim_options=None, clim_tolerance=0, **kwargs):
         self.func = func
         if ax is None:
             import matplotlib.pyplot as plt
@@ -36,30 +77,185 @@ class Image(DocumentRouter):
             self.image, = self.ax.images
         elif len(self.ax.images) == 0:
             self.image = ax.imshow(numpy.zeros(shape), **kwargs)
+            _full_extents[self.image] = [tuple(shape), tuple(self.image.get_extent()),
+                                         'extent' in kwargs]
             self.ax.figure.colorbar(self.image, ax=self.ax)
             self.label_template = label_template
         else:
             raise ValueError(f"Expected ax to be an axis with no image "
                              f"artists or one image artist. Found "
                              f"ax.images={self.ax.images}")
+        self.blit = blit
+        self._renderer = FigureRenderer.for_figure(self.ax.figure)
+        if blit:
+            self._renderer.add_animated(self.image)
+        if hasattr(clim_strategy, 'update'):
+            self.clim_estimator = clim_strategy
+        else:
+            self.clim_estimator = make_clim_estimator(clim_strategy, **(clim_options or {}))
+        self.clim_tolerance = clim_tolerance
+        self.lod = lod
+        self.lod_min_size = lod_min_size
+        self.level = 0
+        self._frame = None
+        self._levels = None
+        if self.image not in _full_extents:
+            _full_extents[self.image] = [self.image.get_array().shape,
+                                         tuple(self.image.get_extent()), False]
+        if lod:
+            # Showing part of a level changes the extent of the image, which
+            # must not move the view.
+            self.ax.set_autoscale_on(False)
+            self.ax.callbacks.connect('xlim_changed', self._on_view_changed)
+            self.ax.callbacks.connect('ylim_changed', self._on_view_changed)
+            self.ax.figure.canvas.mpl_connect('resize_event', self._on_view_changed)
+
+    @property
+    def frame(self):
+        "The most recent frame, at full resolution"
+        return self._frame
 
     def event_page(self, doc):
+        self.apply_event_page(self.compute_event_page(doc))
+
+    def compute_event_page(self, doc):
+        """
+        Extract the new data from an EventPage.
+
+        This is the "compute" phase of :meth:`event_page`. It does not touch
+        matplotlib, so it may be run on a worker thread.
+        """
         data = self.func(doc)
-        if data is not None:
-            self._update(data)
+        if data is None:
+            return None
+        data = numpy.asarray(data)
+        if data.ndim != 2:
+            # Leave it to _update to complain.
+            return [data], None
+        # Build the pyramid and estimate the color limits here, so that they
+        # can be offloaded too. This is the only place the estimator is fed,
+        # so it sees each frame once.
+        if self.lod:
+            levels = image_pyramid(data, self.lod_min_size)
+        else:
+            levels = [data]
+        return levels, self.clim_estimator.update(data)
+
+    def apply_event_page(self, result):
+        """
+        Update the plot with the result of :meth:`compute_event_page`.
 
-    def _update(self, arr):
+        This is the "apply" phase of :meth:`event_page`. It must be run on the
+        thread that owns the Figure.
+        """
+        if result is None:
+            return
+        levels, clim = result
+        if self.lod:
+            self._levels = levels
+        self._update(levels[0], clim)
+
+    def _update(self, arr, clim=None):
         """
         Takes in new array data and redraws plot if they are not empty.
+
+        If ``clim`` is None, the color limits are left as they are.
         """
         if arr.ndim != 2:
             raise ValueError(
                 f'The number of dimensions must be 2, but received array '
                 f'has {arr.ndim} number of dimensions.')
-        self.image.set_array(arr)
-        new_clim = self.infer_clim(self.image.get_clim(), arr)
-        self.image.set_clim(*new_clim)
-        self.ax.figure.canvas.draw_idle()
+        self._frame = arr
+        if self.lod:
+            if self._levels is None or self._levels[0] is not arr:
+                self._levels = image_pyramid(arr, self.lod_min_size)
+            _image_owners[self.image] = weakref.ref(self)
+            if arr.shape != _full_extents[self.image][0]:
+                self._reshape_extent(arr.shape)
+            self._show_level()
+        else:
+            self.image.set_array(arr)
+        changed = False
+        if clim is not None:
+            old_clim = self.image.get_clim()
+            tolerance = self.clim_tolerance * abs(old_clim[1] - old_clim[0])
+            changed = (abs(clim[0] - old_clim[0]) > tolerance
+                       or abs(clim[1] - old_clim[1]) > tolerance
+                       or old_clim[0] == old_clim[1])
+            if changed:
+                self.image.set_clim(*clim)
+        # The colorbar only needs redrawing if the color limits changed.
+        full = not self.blit or changed
+        self._renderer.request_draw(None if full else self.ax)
+
+    def _reshape_extent(self, shape):
+        """
+        Update the full-resolution extent for frames of a new shape.
 
-    def infer_clim(self, current_clim, arr):
-        return (min(current_clim[0], arr.min()), max(current_clim[1], arr.max()))
+        Unless an extent was given explicitly, it follows the shape, as
+        matplotlib's default does, and the view is reset to show all of it.
+        """
+        entry = _full_extents[self.image]
+        entry[0] = shape
+        if entry[2]:
+            return
+        ny, nx = shape
+        if self.image.origin == 'upper':
+            extent = (-0.5, nx - 0.5, ny - 0.5, -0.5)
+        else:
+            extent = (-0.5, nx - 0.5, -0.5, ny - 0.5)
+        entry[1] = extent
+        self.ax.set_xlim(extent[:2])
+        self.ax.set_ylim(extent[2:])
+
+    def _show_level(self):
+        """
+        Give the image the visible part of the pyramid level suited to the view.
+        """
+        full = self._levels[0]
+        ny, nx = full.shape
+        left, right, bottom, top = _full_extents[self.image][1]
+        # Data coordinate of the edge of pixel column c is x0 + c * dx, and
+        # likewise for rows.
+        x0, dx = left, (right - left) / nx
+        if self.image.origin == 'upper':
+            y0, dy = top, (bottom - top) / ny
+        else:
+            y0, dy = bottom, (top - bottom) / ny
+        cols = numpy.sort((numpy.asarray(self.ax.get_xlim()) - x0) / dx)
+        rows = numpy.sort((numpy.asarray(self.ax.get_ylim()) - y0) / dy)
+        c0, c1 = int(max(numpy.floor(cols[0]), 0)), int(min(numpy.ceil(cols[1]), nx))
+        r0, r1 = int(max(numpy.floor(rows[0]), 0)), int(min(numpy.ceil(rows[1]), ny))
+        if c1 <= c0 or r1 <= r0:
+            # Nothing is visible; show the whole frame at the coarsest level.
+            c0, c1, r0, r1 = 0, nx, 0, ny
+        # Number of frame pixels per screen pixel, in the less dense direction
+        bbox = self.ax.bbox
+        scale = min((c1 - c0) / max(bbox.width, 1), (r1 - r0) / max(bbox.height, 1))
+        level = min(int(numpy.log2(max(scale, 1))), len(self._levels) - 1)
+        factor = 2 ** level
+        data = self._levels[level]
+        lc0, lc1 = c0 // factor, min(-(-c1 // factor), data.shape[1])
+        lr0, lr1 = r0 // factor, min(-(-r1 // factor), data.shape[0])
+        if lc1 <= lc0 or lr1 <= lr0:
+            # The view is within the rows or columns left out of this level.
+            level, factor, data = 0, 1, full
+            lc0, lc1, lr0, lr1 = c0, c1, r0, r1
+        self.level = level
+        self.image.set_data(data[lr0:lr1, lc0:lc1])
+        x_edges = (x0 + lc0 * factor * dx, x0 + lc1 * factor * dx)
+        y_edges = (y0 + lr0 * factor * dy, y0 + lr1 * factor * dy)
+        if self.image.origin == 'upper':
+            self.image.set_extent((*x_edges, y_edges[1], y_edges[0]))
+        else:
+            self.image.set_extent((*x_edges, *y_edges))
+
+    def _on_view_changed(self, *args):
+        """
+        Switch to the level and part of the pyramid that suit the new view.
+        """
+        owner = _image_owners.get(self.image)
+        if self._levels is None or owner is None or owner() is not self:
+            # No frame yet, or a newer Image has taken over this AxesImage.
+            return
+        self._show_level()
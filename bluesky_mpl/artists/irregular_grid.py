@@ -0,0 +1,244 @@
+from event_model import DocumentRouter
+import matplotlib.pyplot as plt
+import numpy
+
+from .render import FigureRenderer
+from .utils import GrowableArray
+
+
+INTERPOLATION_METHODS = ('nearest', 'idw')
+
+
+class IrregularGrid(DocumentRouter):
+    """
+    Draw scattered (x, y, I) points as a gridded image, updating it for each Event.
+
+    Unlike :class:`Grid`, which needs integer cell co-ordinates, this accepts
+    points at arbitrary positions, as produced by spiral, adaptive or jittery
+    fly scans, and rasterizes them onto a regular display grid.
+
+    Each point only influences the display cells within ``radius`` cells of
+    it, so every cell keeps running totals and new points are rasterized by
+    updating only the cells they touch. All the points are kept, and
+    :meth:`rasterize` rebuilds the image from them, for example after changing
+    ``radius`` or ``power``. Setting :attr:`method` rebuilds it by itself.
+
+    Parameters
+    ----------
+    func : callable
+        This must accept an EventPage and return three lists or arrays (x
+        positions, y positions and intensity values) of equal length.
+    shape : tuple
+        The (row, col) shape of the display grid.
+    extent : tuple
+        The (xmin, xmax, ymin, ymax) of the display grid in data co-ordinates.
+        If it has zero width or height, it is padded by half a unit on either
+        side.
+    method : {'nearest', 'idw'}, optional
+        Show the value of the nearest point ('nearest', the default) or the
+        inverse-distance-weighted mean of all the points ('idw') within
+        ``radius`` of each cell center.
+    radius : float, optional
+        The radius of influence of each point, in units of cells. Cells with
+        no point within this radius are left empty. Default is 1.5.
+    power : float, optional
+        The power of the distance in inverse distance weighting. Default is 2.
+    ax : matplotlib Axes, optional.
+        if ``None``, a new Figure and Axes are created.
+    dtype : numpy dtype, optional
+        The dtype of the displayed grid, which must be a floating-point type
+        so that empty cells can be NaN. Default is float64.
+    **kwargs
+        Passed through to :meth:`Axes.imshow` to style the AxesImage object.
+    """
+    def __init__(self, func, shape, extent, *, method='nearest', radius=1.5, power=2,
+                 ax=None, dtype=float, **kwargs):
+        _check_method(method)
+        if numpy.dtype(dtype).kind != 'f':
+            raise ValueError(f"dtype must be a floating-point type, not {dtype!r}")
+        self.func = func
+        self.shape = tuple(shape)
+        self.extent = _pad_extent(extent)
+        self._method = method
+        self.radius = radius
+        self.power = power
+        if ax is None:
+            _, ax = plt.subplots()
+        self.ax = ax
+        self.grid_data = numpy.full(self.shape, numpy.nan, dtype=dtype)
+        # Every point received so far, for rebuilding the image.
+        self._x = GrowableArray()
+        self._y = GrowableArray()
+        self._I = GrowableArray()
+        # Interpolated values lie within the range of the inputs, so the
+        # color limits can follow the running range of the inputs.
+        self._clim = None
+        self._reset_accumulators()
+        kwargs.setdefault('origin', 'lower')
+        self.image = ax.imshow(self.grid_data, extent=self.extent, **kwargs)
+        self.ax.figure.colorbar(self.image, ax=self.ax)
+        self._renderer = FigureRenderer.for_figure(self.ax.figure)
+
+    @property
+    def method(self):
+        "The interpolation method, 'nearest' or 'idw'. Setting it rebuilds the image."
+        return self._method
+
+    @method.setter
+    def method(self, method):
+        _check_method(method)
+        if method != self._method:
+            self._method = method
+            self.rasterize()
+
+    def _reset_accumulators(self):
+        self.grid_data[...] = numpy.nan
+        if self.method == 'nearest':
+            # Distance from each cell center to the nearest point so far
+            self._best = numpy.full(self.shape, numpy.inf)
+        else:
+            # Sums of weights and of weighted values for each cell
+            self._weights = numpy.zeros(self.shape)
+            self._weighted = numpy.zeros(self.shape)
+
+    def event_page(self, doc):
+        self.apply_event_page(self.compute_event_page(doc))
+
+    def compute_event_page(self, doc):
+        """
+        Extract the new data from an EventPage.
+
+        This is the "compute" phase of :meth:`event_page`. It does not touch
+        matplotlib, so it may be run on a worker thread.
+        """
+        return tuple(numpy.asarray(a, dtype=float) for a in self.func(doc))
+
+    def apply_event_page(self, result):
+        """
+        Update the plot with the result of :meth:`compute_event_page`.
+
+        This is the "apply" phase of :meth:`event_page`. It must be run on the
+        thread that owns the Figure.
+        """
+        x, y, I_vals = result
+        self._update(x, y, I_vals)
+
+    def _update(self, x, y, I_vals):
+        """
+        Store the new points and rasterize the cells they touch.
+        """
+        x = numpy.asarray(x, dtype=float).ravel()
+        y = numpy.asarray(y, dtype=float).ravel()
+        I_vals = numpy.asarray(I_vals, dtype=float).ravel()
+        if not len(x) == len(y) == len(I_vals):
+            raise ValueError(f"User function is expected to provide the same "
+                             f"number of x, y and I points. Got {len(x)} x points, "
+                             f"{len(y)} y points and {len(I_vals)} I values.")
+        if not len(x):
+            # No new data. Short-circuit.
+            return
+        self._x.extend(x)
+        self._y.extend(y)
+        self._I.extend(I_vals)
+        self._update_clim(I_vals)
+        self._rasterize(x, y, I_vals)
+        self._redraw()
+
+    def rasterize(self):
+        """
+        Rebuild the image from all the points received so far.
+        """
+        self._reset_accumulators()
+        # Work in chunks to bound the size of the temporaries.
+        chunk_size = 100000
+        for start in range(0, len(self._x), chunk_size):
+            chunk = slice(start, start + chunk_size)
+            self._rasterize(self._x.data[chunk], self._y.data[chunk], self._I.data[chunk])
+        self._redraw()
+
+    def _neighborhood(self, x, y):
+        """
+        Find the cells within self.radius of each point.
+
+        Returns
+        -------
+        cells : array
+            Flat indices of the cells
+        distances : array
+            Distance from each point to each cell center, in units of cells
+        points : array
+            Index of the point that each cell/distance pair belongs to
+        """
+        num_rows, num_cols = self.shape
+        xmin, xmax, ymin, ymax = self.extent
+        # Positions in units of cells, such that cell centers are integers.
+        col = (x - xmin) / (xmax - xmin) * num_cols - 0.5
+        row = (y - ymin) / (ymax - ymin) * num_rows - 0.5
+        reach = int(numpy.ceil(self.radius))
+        offsets = numpy.arange(-reach, reach + 1)
+        # Broadcast to shape (point, row offset, col offset).
+        rows = numpy.rint(row)[:, None, None] + offsets[None, :, None]
+        cols = numpy.rint(col)[:, None, None] + offsets[None, None, :]
+        distances = numpy.hypot(rows - row[:, None, None], cols - col[:, None, None])
+        points = numpy.broadcast_to(
+            numpy.arange(len(x))[:, None, None], distances.shape)
+        keep = ((distances <= self.radius)
+                & (rows >= 0) & (rows < num_rows) & (cols >= 0) & (cols < num_cols))
+        rows, cols = numpy.broadcast_arrays(rows, cols)
+        cells = numpy.ravel_multi_index(
+            (rows[keep].astype(numpy.intp), cols[keep].astype(numpy.intp)), self.shape)
+        return cells, distances[keep], points[keep]
+
+    def _rasterize(self, x, y, I_vals):
+        finite = numpy.isfinite(x) & numpy.isfinite(y) & numpy.isfinite(I_vals)
+        x, y, I_vals = x[finite], y[finite], I_vals[finite]
+        cells, distances, points = self._neighborhood(x, y)
+        if not len(cells):
+            return
+        values = I_vals[points]
+        grid = self.grid_data.reshape(-1)
+        if self.method == 'nearest':
+            best = self._best.reshape(-1)
+            numpy.minimum.at(best, cells, distances)
+            nearest = distances <= best[cells]
+            grid[cells[nearest]] = values[nearest]
+        else:
+            weights = 1 / numpy.maximum(distances, 1e-6) ** self.power
+            numpy.add.at(self._weights.reshape(-1), cells, weights)
+            numpy.add.at(self._weighted.reshape(-1), cells, weights * values)
+            touched = numpy.unique(cells)
+            grid[touched] = (self._weighted.reshape(-1)[touched]
+                             / self._weights.reshape(-1)[touched])
+
+    def _update_clim(self, I_vals):
+        finite = I_vals[numpy.isfinite(I_vals)]
+        if not len(finite):
+            return
+        low, high = finite.min(), finite.max()
+        if self._clim is not None:
+            low, high = min(low, self._clim[0]), max(high, self._clim[1])
+        self._clim = (low, high)
+
+    def _redraw(self):
+        self.image.set_array(self.grid_data)
+        if self._clim is not None:
+            self.image.set_clim(*self._clim)
+        self._renderer.request_draw()
+
+
+def _check_method(method):
+    if method not in INTERPOLATION_METHODS:
+        raise ValueError(f"method must be one of {INTERPOLATION_METHODS}, "
+                         f"not {method!r}")
+
+
+def _pad_extent(extent):
+    "Check an (xmin, xmax, ymin, ymax) extent, padding any zero width or height."
+    xmin, xmax, ymin, ymax = (float(value) for value in extent)
+    if not numpy.isfinite([xmin, xmax, ymin, ymax]).all():
+        raise ValueError(f"extent must be finite, not {extent!r}")
+    if xmin == xmax:
+        xmin, xmax = xmin - 0.5, xmax + 0.5
+    if ymin == ymax:
+        ymin, ymax = ymin - 0.5, ymax + 0.5
+    return (xmin, xmax, ymin, ymax)
@@ -1,9 +1,21 @@
+import ast
 import collections
+import weakref
 
 from event_model import DocumentRouter
 import matplotlib.pyplot as plt
 import numpy
 
+from .render import FigureRenderer
+from .utils import GrowableArray, lttb_indices, minmax_indices
+
+
+DECIMATION_MODES = ('minmax', 'lttb')
+
+# Map each Axes to the Line instances drawing on it, so that a full relim can
+# restore the bounds of every Line rather than only of what is drawn.
+_lines_by_axes = weakref.WeakKeyDictionary()
+
 
 class Line(DocumentRouter):
     """
@@ -22,6 +34,17 @@ class Line(DocumentRouter):
         given, this argument will be ignored.
     ax : matplotlib Axes, optional
         If None, a new Figure and Axes are created.
+    decimate : {None, 'minmax', 'lttb'}, optional
+        If given, all the data is retained but only a reduced view of it,
+        sized to the pixel width of the Axes, is drawn. 'minmax' keeps the
+        minimum and maximum of each pixel column; 'lttb' uses the
+        Largest-Triangle-Three-Buckets algorithm. The view is recomputed when
+        the limits of the Axes or the size of the canvas change. Default is
+        None, which draws every point.
+    blit : boolean, optional
+        If True, redraw only this Line on top of a cached background when new
+        data arrives, and redraw the whole Figure only when the limits of the
+        Axes change. Default is False.
     **kwargs
         Passed through to :meth:`Axes.plot` to style Line object.
 
@@ -41,19 +64,54 @@ class Line(DocumentRouter):
     See :meth:`Line.from_expr` for a more sunccinct way to achieve this kind of
     thing.
     """
-    def __init__(self, func, *, label_template='{scan_id} [{uid:.8}]', ax=None, **kwargs):
+    def __init__(self, func, *, label_template='{scan_id} [{uid:.8}]', ax=None,
+                 decimate=None, blit=False, **kwargs):
+        if decimate not in (None,) + DECIMATION_MODES:
+            raise ValueError(f"decimate must be None or one of {DECIMATION_MODES}, "
+                             f"not {decimate!r}")
         self.func = func
         if ax is None:
             _, ax = plt.subplots()
         self.ax = ax
+        self.decimate = decimate
         self.line, = ax.plot([], [], **kwargs)
-        self.x_data = []
-        self.y_data = []
+        self.blit = blit
+        self._renderer = FigureRenderer.for_figure(ax.figure)
+        if blit:
+            self._renderer.add_animated(self.line)
+        # Accumulate data in preallocated arrays that grow geometrically so
+        # that each update appends in place rather than re-converting a list.
+        self._x_buffer = GrowableArray()
+        self._y_buffer = GrowableArray()
+        # Track whether x is monotonic, which lets decimation restrict itself
+        # to the visible range with a binary search.
+        self._x_sorted = True
+        self._updating = False
+        # Running (xmin, xmax, ymin, ymax) of the finite data, used to extend
+        # the Axes data limits without rescanning every artist.
+        self._bounds = None
+        self._visible = self.line.get_visible()
+        self.line.add_callback(self._on_artist_changed)
+        _lines_by_axes.setdefault(ax, weakref.WeakSet()).add(self)
+        if decimate is not None:
+            ax.callbacks.connect('xlim_changed', self._on_view_changed)
+            ax.figure.canvas.mpl_connect('resize_event', self._on_view_changed)
         self.label_template = label_template
         self.label = kwargs.get('label')
 
+    @property
+    def x_data(self):
+        "All x points received so far (a view of the buffer, not a copy)"
+        return self._x_buffer.data
+
+    @property
+    def y_data(self):
+        "All y points received so far (a view of the buffer, not a copy)"
+        return self._y_buffer.data
+
     @classmethod
-    def from_expr(cls, x, y, *, label_template='{scan_id} [{uid:.8}]', ax=None, **kwargs):
+    def from_expr(cls, x, y, *, label_template='{scan_id} [{uid:.8}]', ax=None,
+                  decimate=None, blit=False, **kwargs):
         """
         Construct a Line from expressions given as strings.
 
@@ -71,6 +129,10 @@ class Line(DocumentRouter):
             given, this argument will be ignored.
         ax : matplotlib Axes, optional
             If None, a new Figure and Axes are created.
+        decimate : {None, 'minmax', 'lttb'}, optional
+            See :class:`Line`.
+        blit : boolean, optional
+            See :class:`Line`.
         **kwargs
             Passed through to :meth:`Axes.plot` to style Line object.
 
@@ -93,13 +155,13 @@ class Line(DocumentRouter):
 
         >>> line = Line.from_expr('seq_num', 'log(I/I0)')
         """
+        x_expr = _Expression(x)
+        y_expr = _Expression(y)
+
         def func(event_page):
-            namespace = dict(collections.ChainMap(
-                {k: numpy.asarray(v) for k, v in event_page['data'].items()},
-                event_page,
-                numpy.__dict__))
-            return eval(x, namespace), eval(y, namespace)
-        return cls(func, label_template=label_template, ax=ax, **kwargs)
+            return x_expr(event_page), y_expr(event_page)
+        return cls(func, label_template=label_template, ax=ax, decimate=decimate,
+                   blit=blit, **kwargs)
 
     def start(self, doc):
         if self.label is None:
@@ -113,7 +175,26 @@ class Line(DocumentRouter):
             self.ax.legend(loc='best')
 
     def event_page(self, doc):
+        self.apply_event_page(self.compute_event_page(doc))
+
+    def compute_event_page(self, doc):
+        """
+        Extract the new data from an EventPage.
+
+        This is the "compute" phase of :meth:`event_page`. It does not touch
+        matplotlib, so it may be run on a worker thread.
+        """
         x, y = self.func(doc)
+        return numpy.asarray(x, dtype=float), numpy.asarray(y, dtype=float)
+
+    def apply_event_page(self, result):
+        """
+        Update the plot with the result of :meth:`compute_event_page`.
+
+        This is the "apply" phase of :meth:`event_page`. It must be run on the
+        thread that owns the Figure.
+        """
+        x, y = result
         self._update(x, y)
 
     def _update(self, x, y):
@@ -121,15 +202,163 @@ class Line(DocumentRouter):
         Takes in new x and y points and redraws plot if they are not empty.
         """
         if not len(x) == len(y):
-            raise ValueError("User function is expected to provide the same "
-                             "number of x and y points. Got {len(x)} x points "
-                             "and {len(y)} y points.")
-        if not x:
+            raise ValueError(f"User function is expected to provide the same "
+                             f"number of x and y points. Got {len(x)} x points "
+                             f"and {len(y)} y points.")
+        if not len(x):
             # No new data. Short-circuit.
             return
-        self.x_data.extend(x)
-        self.y_data.extend(y)
-        self.line.set_data(self.x_data, self.y_data)
+        previous_length = len(self._x_buffer)
+        self._x_buffer.extend(x)
+        self._y_buffer.extend(y)
+        if self._x_sorted:
+            # Include the last previously-seen point in the check.
+            new_x = self.x_data[max(previous_length - 1, 0):]
+            self._x_sorted = bool(numpy.all(new_x[1:] >= new_x[:-1]))
+        self._set_line_data()
+        self._update_bounds(x, y)
+        limits = self.ax.viewLim.frozen()
+        self._updating = True
+        try:
+            if self.line.get_visible():
+                self._update_datalim()
+            self.ax.autoscale_view(tight=True)
+        finally:
+            self._updating = False
+        # If autoscaling moved the limits, the ticks must be redrawn too.
+        limits_changed = not numpy.array_equal(limits.bounds, self.ax.viewLim.bounds)
+        self._request_draw(full=limits_changed)
+
+    def _request_draw(self, full=True):
+        "Redraw the Figure, or only this Line if blitting and full is False."
+        self._renderer.request_draw(None if full or not self.blit else self.ax)
+
+    def _update_bounds(self, x, y):
+        "Fold the new points into the running bounds."
+        x = numpy.asarray(x, dtype=float)
+        y = numpy.asarray(y, dtype=float)
+        x = x[numpy.isfinite(x)]
+        y = y[numpy.isfinite(y)]
+        if not (len(x) and len(y)):
+            return
+        new = (x.min(), x.max(), y.min(), y.max())
+        if self._bounds is None:
+            self._bounds = new
+        else:
+            xmin, xmax, ymin, ymax = self._bounds
+            self._bounds = (min(xmin, new[0]), max(xmax, new[1]),
+                            min(ymin, new[2]), max(ymax, new[3]))
+
+    def _update_datalim(self):
+        "Extend the Axes data limits to include this Line's data."
+        if self._bounds is None:
+            return
+        xmin, xmax, ymin, ymax = self._bounds
+        self.ax.update_datalim([(xmin, ymin), (xmax, ymax)])
+
+    def _relim(self):
+        """
+        Recompute the Axes data limits from scratch.
+
+        This is only necessary when an artist is removed or hidden, because
+        the limits can then shrink.
+        """
         self.ax.relim(visible_only=True)
+        # The drawn data may be decimated, so restore the full bounds.
+        for line in _lines_by_axes.get(self.ax, ()):
+            if line.line.get_visible() and line.line.axes is not None:
+                line._update_datalim()
         self.ax.autoscale_view(tight=True)
-        self.ax.figure.canvas.draw_idle()
+        self._request_draw()
+
+    def _on_artist_changed(self, artist):
+        "Recompute the limits if the Line has been shown or hidden."
+        visible = artist.get_visible()
+        if visible != self._visible:
+            self._visible = visible
+            self._relim()
+
+    def remove(self):
+        """
+        Remove the Line from the Axes and rescale the Axes to what remains.
+        """
+        if self.blit:
+            self._renderer.remove_animated(self.line)
+        self.line.remove()
+        _lines_by_axes.get(self.ax, set()).discard(self)
+        self._relim()
+
+    def _set_line_data(self):
+        "Give matplotlib the data, decimated if requested."
+        x, y = self.x_data, self.y_data
+        if self.decimate is not None:
+            x, y = self._decimated(x, y)
+        self.line.set_data(x, y)
+
+    def _decimated(self, x, y):
+        """
+        Reduce x and y to roughly two points per pixel column of the Axes.
+        """
+        width = int(self.ax.bbox.width)
+        if width < 1 or len(x) <= 2 * width:
+            return x, y
+        start, stop = 0, len(x)
+        if self._x_sorted and not self.ax.get_autoscalex_on():
+            # The view has been zoomed or panned. Only decimate what is visible,
+            # plus one point on either side so the line runs off the edges.
+            low, high = sorted(self.ax.get_xlim())
+            start = max(numpy.searchsorted(x, low, side='left') - 1, 0)
+            stop = min(numpy.searchsorted(x, high, side='right') + 1, len(x))
+        x, y = x[start:stop], y[start:stop]
+        if self.decimate == 'minmax':
+            indices = minmax_indices(y, width)
+        else:
+            indices = lttb_indices(x, y, 2 * width)
+        return x[indices], y[indices]
+
+    def _on_view_changed(self, *args):
+        """
+        Recompute the decimated view when the Axes limits or canvas size change.
+        """
+        if self._updating or not len(self._x_buffer):
+            # Autoscaling during an update leaves the visible range covering
+            # all the data, which was decimated already.
+            return
+        self._set_line_data()
+        self._request_draw()
+
+
+class _Expression:
+    """
+    An expression in terms of Event fields, compiled once for repeated use.
+
+    Names in the expression are resolved against, in order of precedence, the
+    EventPage's 'data', the EventPage itself (e.g. 'time', 'seq_num'), and the
+    numpy namespace. Only the names that the expression actually references
+    are looked up for each EventPage.
+    """
+    def __init__(self, source):
+        self.source = source
+        tree = ast.parse(source.strip(), mode='eval')
+        self._code = compile(tree, f'<expression {source!r}>', 'eval')
+        self.names = frozenset(node.id for node in ast.walk(tree)
+                               if isinstance(node, ast.Name))
+        # Resolve the names that could refer to numpy up front. A field of the
+        # same name will still take precedence.
+        self._numpy_names = {name: getattr(numpy, name) for name in self.names
+                             if hasattr(numpy, name)}
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.source!r})"
+
+    def __call__(self, event_page):
+        data = event_page['data']
+        namespace = {}
+        for name in self.names:
+            if name in data:
+                namespace[name] = numpy.asarray(data[name])
+            elif name in event_page:
+                namespace[name] = event_page[name]
+            elif name in self._numpy_names:
+                namespace[name] = self._numpy_names[name]
+        return eval(self._code, namespace)
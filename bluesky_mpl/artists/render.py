@@ -0,0 +1,170 @@
+import numpy
+
+from .. import latency
+
+
+class FigureRenderer:
+    """
+    Coordinate the redrawing of one matplotlib Figure.
+
+    Artists request redraws through this object instead of calling
+    ``figure.canvas.draw_idle()`` directly. A request is either for a full
+    redraw of the Figure or for a blit of one Axes, in which case only the
+    "animated" artists registered on that Axes are redrawn on top of a cached
+    copy of its static background (axes, ticks, labels, legend).
+
+    Use :meth:`FigureRenderer.for_figure` to get the renderer shared by all
+    artists in a given Figure. It is stored on the Figure itself, so that it
+    does not keep the Figure alive.
+
+    By default, requests are rendered immediately. If a ``scheduler`` is set,
+    requests are handed to its ``schedule(renderer)`` method instead, and the
+    scheduler is responsible for calling :meth:`render` later. This allows
+    several requests to be coalesced into one repaint.
+
+    Requests made while a document is being applied (see
+    :meth:`bluesky_mpl.latency.LatencyMonitor.updating`) remember the times of
+    its Events, and their 'draw' latency is recorded once they are drawn. A
+    document is counted once however many redraws it requests. At most
+    ``max_pending_documents`` are remembered, so that a Figure that is never
+    drawn (for example, in a hidden tab) does not accumulate them; the oldest
+    are dropped.
+
+    Parameters
+    ----------
+    figure : matplotlib Figure
+    """
+    max_pending_documents = 1000
+
+    def __init__(self, figure):
+        self.figure = figure
+        self._animated = {}  # maps Axes to list of animated artists
+        self._backgrounds = {}  # maps Axes to cached background
+        self._dirty_axes = set()
+        self._full_redraw = False
+        self._canvas = None
+        self._cid = None
+        self.scheduler = None
+        self._pending_times = {}  # maps document key to Event times waiting to be drawn
+        self._connect()
+
+    @classmethod
+    def for_figure(cls, figure):
+        "Get the renderer for this Figure, creating it if necessary."
+        # The Figure and its renderer refer to each other, a cycle that the
+        # garbage collector frees once nothing else refers to either.
+        renderer = getattr(figure, '_bluesky_mpl_renderer', None)
+        if renderer is None:
+            renderer = figure._bluesky_mpl_renderer = cls(figure)
+        return renderer
+
+    def __repr__(self):
+        return f"<{type(self).__name__} {self.figure!r}>"
+
+    def _connect(self):
+        # The canvas can be swapped out from under a Figure, for example when
+        # it is embedded in a Qt widget after it has been created.
+        canvas = self.figure.canvas
+        if canvas is self._canvas:
+            return
+        if self._canvas is not None:
+            self._canvas.mpl_disconnect(self._cid)
+            self._backgrounds.clear()
+        self._canvas = canvas
+        self._cid = canvas.mpl_connect('draw_event', self._on_draw)
+
+    @property
+    def supports_blit(self):
+        return bool(getattr(self.figure.canvas, 'supports_blit', False))
+
+    @property
+    def dirty(self):
+        "Whether a redraw has been requested but not yet rendered."
+        return self._full_redraw or bool(self._dirty_axes)
+
+    def add_animated(self, artist):
+        """
+        Register an artist to be redrawn by blitting its Axes.
+
+        The artist is marked as animated, so it is excluded from full redraws
+        of the Figure and drawn on top of the cached background instead.
+        """
+        artist.set_animated(True)
+        artists = self._animated.setdefault(artist.axes, [])
+        if artist not in artists:
+            artists.append(artist)
+
+    def remove_animated(self, artist):
+        "Stop blitting an artist and return it to normal drawing."
+        artists = self._animated.get(artist.axes, [])
+        if artist in artists:
+            artists.remove(artist)
+        artist.set_animated(False)
+        self.request_draw()
+
+    def request_draw(self, ax=None):
+        """
+        Request a redraw.
+
+        Parameters
+        ----------
+        ax : matplotlib Axes, optional
+            If given, only the animated artists in this Axes need redrawing.
+            Otherwise, or if no background has been cached for this Axes yet,
+            the whole Figure is redrawn.
+        """
+        self._connect()
+        current = latency.monitor.current_document()
+        if current is not None:
+            key, times = current
+            if key not in self._pending_times:
+                if len(self._pending_times) >= self.max_pending_documents:
+                    del self._pending_times[next(iter(self._pending_times))]
+                self._pending_times[key] = times
+        if ax is None or ax not in self._backgrounds or not self.supports_blit:
+            self._full_redraw = True
+        else:
+            self._dirty_axes.add(ax)
+        if self.scheduler is None:
+            self.render()
+        else:
+            self.scheduler.schedule(self)
+
+    def render(self):
+        "Perform any pending redraw."
+        canvas = self.figure.canvas
+        if self._full_redraw:
+            self._full_redraw = False
+            self._dirty_axes.clear()
+            # The backgrounds are re-cached by _on_draw.
+            canvas.draw_idle()
+        elif self._dirty_axes:
+            dirty_axes, self._dirty_axes = self._dirty_axes, set()
+            for ax in dirty_axes:
+                canvas.restore_region(self._backgrounds[ax])
+                self._draw_animated(ax)
+                canvas.blit(ax.bbox)
+            self._record_drawn()
+
+    def _draw_animated(self, ax):
+        for artist in self._animated.get(ax, ()):
+            if artist.axes is ax:
+                ax.draw_artist(artist)
+
+    def _record_drawn(self):
+        if self._pending_times:
+            times, self._pending_times = self._pending_times, {}
+            latency.monitor.record('draw', numpy.concatenate(list(times.values())))
+
+    def _on_draw(self, event):
+        "After a full draw, cache the backgrounds and draw the animated artists."
+        self._record_drawn()
+        canvas = self.figure.canvas
+        self._backgrounds.clear()
+        if not self.supports_blit:
+            return
+        for ax, artists in self._animated.items():
+            if not artists or ax.figure is not self.figure:
+                continue
+            self._backgrounds[ax] = canvas.copy_from_bbox(ax.bbox)
+            self._draw_animated(ax)
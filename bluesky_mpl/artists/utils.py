@@ -0,0 +1,190 @@
+import numpy
+
+
+class GrowableArray:
+    """
+    A 1-D array that supports amortized O(1) appends.
+
+    Storage is preallocated and doubled whenever it fills up, so appending a
+    batch of N items costs O(N) regardless of how much data is already
+    stored. The filled region is exposed as a view with no copy.
+
+    Parameters
+    ----------
+    dtype : numpy dtype, optional
+        Default is float64.
+    capacity : int, optional
+        Number of items to preallocate. Default is 1024.
+
+    Examples
+    --------
+    >>> arr = GrowableArray()
+    >>> arr.extend([1, 2, 3])
+    >>> arr.data
+    array([1., 2., 3.])
+    """
+    def __init__(self, dtype=float, capacity=1024):
+        self._buffer = numpy.empty(max(int(capacity), 1), dtype=dtype)
+        self._length = 0
+
+    def __len__(self):
+        return self._length
+
+    def __repr__(self):
+        return f"<{type(self).__name__} length={self._length} capacity={self.capacity}>"
+
+    @property
+    def capacity(self):
+        return len(self._buffer)
+
+    @property
+    def dtype(self):
+        return self._buffer.dtype
+
+    @property
+    def data(self):
+        "A view of the filled region of the buffer (not a copy)."
+        return self._buffer[:self._length]
+
+    def extend(self, values):
+        """
+        Append a batch of values, growing the storage geometrically if needed.
+        """
+        values = numpy.asarray(values, dtype=self._buffer.dtype).ravel()
+        new_length = self._length + len(values)
+        if new_length > self.capacity:
+            capacity = self.capacity
+            while capacity < new_length:
+                capacity *= 2
+            buffer = numpy.empty(capacity, dtype=self._buffer.dtype)
+            buffer[:self._length] = self._buffer[:self._length]
+            self._buffer = buffer
+        self._buffer[self._length:new_length] = values
+        self._length = new_length
+
+    def clear(self):
+        "Discard the contents but keep the allocated storage."
+        self._length = 0
+
+
+def minmax_indices(y, num_bins):
+    """
+    Choose a subset of points that preserves the envelope of y.
+
+    The points are split into ``num_bins`` consecutive bins and the minimum and
+    maximum of each bin are kept, along with the first and last points. When
+    one bin maps to one pixel column, the decimated line is visually
+    indistinguishable from the full one.
+
+    Parameters
+    ----------
+    y : array
+    num_bins : int
+
+    Returns
+    -------
+    indices : array
+        Sorted indices into y
+    """
+    y = numpy.asarray(y)
+    n = len(y)
+    num_bins = max(int(num_bins), 1)
+    if n <= 2 * num_bins:
+        return numpy.arange(n)
+    bin_size = -(-n // num_bins)  # ceiling division
+    num_full = n // bin_size
+    # Do not let NaNs win the argmin/argmax.
+    nan = numpy.isnan(y)
+    low = numpy.where(nan, numpy.inf, y)
+    high = numpy.where(nan, -numpy.inf, y)
+    offsets = numpy.arange(num_full) * bin_size
+    stop = num_full * bin_size
+    chunks = [
+        offsets + low[:stop].reshape(num_full, bin_size).argmin(axis=1),
+        offsets + high[:stop].reshape(num_full, bin_size).argmax(axis=1),
+        [0, n - 1]]
+    if stop < n:
+        # A partial bin is left over at the end.
+        chunks.append([stop + low[stop:].argmin(), stop + high[stop:].argmax()])
+    return numpy.unique(numpy.concatenate(chunks).astype(int))
+
+
+def lttb_indices(x, y, num_out):
+    """
+    Choose a subset of points using Largest-Triangle-Three-Buckets.
+
+    This keeps the first and last points and, from each of ``num_out - 2``
+    buckets in between, the point that forms the largest triangle with the
+    previously chosen point and the average of the next bucket. See Sveinn
+    Steinarsson, "Downsampling Time Series for Visual Representation" (2013).
+
+    Parameters
+    ----------
+    x : array
+    y : array
+    num_out : int
+
+    Returns
+    -------
+    indices : array
+        Sorted indices into x and y
+    """
+    x = numpy.asarray(x, dtype=float)
+    y = numpy.asarray(y, dtype=float)
+    n = len(x)
+    num_out = int(num_out)
+    if num_out >= n or num_out < 3:
+        return numpy.arange(n)
+    # Bucket edges for the points strictly between the first and the last.
+    edges = numpy.linspace(1, n - 1, num_out - 1).astype(int)
+    # Precompute the average point of each bucket; the last point serves as
+    # the "next bucket" for the final bucket.
+    counts = numpy.diff(edges)
+    x_means = numpy.append(numpy.add.reduceat(x[:-1], edges[:-1]) / counts, x[-1])
+    y_means = numpy.append(numpy.add.reduceat(y[:-1], edges[:-1]) / counts, y[-1])
+    indices = numpy.empty(num_out, dtype=int)
+    indices[0] = 0
+    indices[-1] = n - 1
+    a = 0
+    for i in range(num_out - 2):
+        start, stop = edges[i], edges[i + 1]
+        # Twice the area of the triangle formed by the chosen point a,
+        # each candidate, and the mean of the next bucket.
+        area = numpy.abs(
+            (x[a] - x_means[i + 1]) * (y[start:stop] - y[a])
+            - (x[a] - x[start:stop]) * (y_means[i + 1] - y[a]))
+        a = start + numpy.nanargmax(area) if not numpy.isnan(area).all() else start
+        indices[i + 1] = a
+    return indices
+
+
+def image_pyramid(arr, min_size=256):
+    """
+    Build successively halved copies of a 2-D array, for level-of-detail display.
+
+    Each level is the mean of 2x2 blocks of the one before it, as float32. If
+    a dimension is odd, its last row or column is left out of the next level.
+
+    Parameters
+    ----------
+    arr : array
+        The full-resolution image, which is level 0 (not copied)
+    min_size : int, optional
+        Stop once both dimensions are no larger than this. Default is 256.
+
+    Returns
+    -------
+    levels : list of arrays
+    """
+    levels = [arr]
+    while max(arr.shape) > min_size and min(arr.shape) >= 2:
+        ny, nx = arr.shape[0] // 2 * 2, arr.shape[1] // 2 * 2
+        arr = arr[:ny, :nx]
+        level = arr[0::2, 0::2].astype(numpy.float32)
+        level += arr[1::2, 0::2]
+        level += arr[0::2, 1::2]
+        level += arr[1::2, 1::2]
+        level *= 0.25
+        levels.append(level)
+        arr = level
+    return levels
@@ -0,0 +1,265 @@
+"""
+Measure the throughput of the live plotting pipeline with synthetic documents.
+
+Run from the command line, for example:
+
+    python -m bluesky_mpl.benchmarks --kind scalar --events 10000
+    python -m bluesky_mpl.benchmarks --kind image --image-shape 2048 2048 --backend qt
+
+or from Python:
+
+>>> from bluesky_mpl.benchmarks import generate_documents, run_benchmark
+>>> result = run_benchmark(generate_documents('grid', grid_shape=(64, 64)))
+>>> print(format_result(result))
+
+The 'headless' backend uses Agg canvases and needs no display. The 'qt'
+backend uses the real Qt FigureDispatcher; with no display available, set
+the environment variable QT_QPA_PLATFORM=offscreen.
+"""
+import argparse
+import os
+import resource
+import sys
+import time
+import uuid
+
+import event_model
+import numpy
+
+
+KINDS = ('scalar', 'timeseries', 'image', 'grid')
+BACKENDS = ('headless', 'qt')
+
+
+def generate_documents(kind='scalar', *, num_events=1000, page_size=1, num_fields=1,
+                       image_shape=(512, 512), grid_shape=(32, 32), rate=None):
+    """
+    Generate the documents of one synthetic run.
+
+    Parameters
+    ----------
+    kind : {'scalar', 'timeseries', 'image', 'grid'}, optional
+        'scalar' is a step scan of one motor, 'timeseries' has no motor, 'image'
+        has one area detector field and 'grid' is a 2-D grid scan.
+    num_events : int, optional
+        Number of Events. For 'grid' this is ignored, and there is one Event
+        per cell of ``grid_shape``.
+    page_size : int, optional
+        If 1 (default) emit 'event' documents, otherwise emit 'event_page'
+        documents of up to this many Events.
+    num_fields : int, optional
+        Number of scalar detector fields.
+    image_shape : tuple, optional
+        Shape of each frame for 'image'
+    grid_shape : tuple, optional
+        Number of points along the slow and fast axes for 'grid'
+    rate : float, optional
+        Events per second, used to space out the Events' timestamps. Default
+        is None, meaning as fast as possible (all at the current time).
+
+    Yields
+    ------
+    name, doc
+    """
+    if kind not in KINDS:
+        raise ValueError(f"kind must be one of {KINDS}, not {kind!r}")
+    metadata = {}
+    motors = []
+    if kind in ('scalar', 'image'):
+        motors = ['motor']
+    elif kind == 'grid':
+        motors = ['motor1', 'motor2']
+        num_events = grid_shape[0] * grid_shape[1]
+        metadata.update(shape=tuple(grid_shape), extents=([-1, 1], [-1, 1]),
+                        snaking=(False, True))
+    if motors:
+        metadata.update(motors=motors,
+                        hints={'dimensions': [([motor], 'primary') for motor in motors]})
+    metadata['num_points'] = num_events
+    run = event_model.compose_run(metadata=metadata)
+    yield 'start', run.start_doc
+
+    fields = [f'det{i}' for i in range(num_fields)]
+    data_keys = {key: {'source': 'synthetic', 'dtype': 'number', 'shape': []}
+                 for key in motors + fields}
+    object_keys = {motor: [motor] for motor in motors}
+    object_keys['det'] = list(fields)
+    if kind == 'image':
+        data_keys['img'] = {'source': 'synthetic', 'dtype': 'array',
+                            'shape': list(image_shape)}
+        object_keys['det'].append('img')
+    desc = run.compose_descriptor(name='primary', data_keys=data_keys,
+                                  object_keys=object_keys)
+    yield 'descriptor', desc.descriptor_doc
+
+    rng = numpy.random.default_rng(0)
+    t0 = time.time()
+    for start in range(0, num_events, page_size):
+        i = numpy.arange(start, min(start + page_size, num_events))
+        data = {field: rng.random(len(i)) for field in fields}
+        if kind == 'scalar':
+            data['motor'] = numpy.linspace(-1, 1, num_events)[i]
+        elif kind == 'image':
+            data['motor'] = i.astype(float)
+            data['img'] = rng.random((len(i),) + tuple(image_shape))
+        elif kind == 'grid':
+            rows, cols = numpy.divmod(i, grid_shape[1])
+            cols[rows % 2 == 1] = grid_shape[1] - 1 - cols[rows % 2 == 1]
+            data['motor1'] = numpy.linspace(-1, 1, grid_shape[0])[rows]
+            data['motor2'] = numpy.linspace(-1, 1, grid_shape[1])[cols]
+        times = t0 + (i / rate if rate else 0 * i)
+        page = {'descriptor': desc.descriptor_doc['uid'],
+                'uid': [str(uuid.uuid4()) for _ in i],
+                'seq_num': list(i + 1),
+                'time': list(times),
+                'data': data,
+                'timestamps': {key: list(times) for key in data},
+                'filled': {}}
+        if page_size == 1:
+            yield 'event', next(event_model.unpack_event_page(page))
+        else:
+            yield 'event_page', page
+    yield 'stop', run.compose_stop()
+
+
+def _count_draws(dispatcher, draws):
+    "Count the draw_events of every Figure that the dispatcher makes."
+    add_figure = dispatcher._add_figure
+
+    def counting_add_figure(*args, **kwargs):
+        fig = add_figure(*args, **kwargs)
+        fig.canvas.mpl_connect('draw_event', lambda event: draws.append(time.perf_counter()))
+        return fig
+
+    dispatcher._add_figure = counting_add_figure
+
+
+def run_benchmark(documents, *, backend='headless', realtime=False):
+    """
+    Push documents through a figure dispatcher and measure its performance.
+
+    Parameters
+    ----------
+    documents : iterable
+        (name, doc) pairs, such as from :func:`generate_documents`
+    backend : {'headless', 'qt'}, optional
+    realtime : boolean, optional
+        If True, wait until each Event's 'time' before sending it, to simulate
+        a live stream. Default is False, sending everything as fast as
+        possible.
+
+    Returns
+    -------
+    result : dict
+        Including documents per second, per-document latency percentiles (in
+        seconds), the number of redraws and the peak resident set size of the
+        process (in bytes)
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"backend must be one of {BACKENDS}, not {backend!r}")
+    draws = []
+    app = None
+    if backend == 'headless':
+        from .headless import HeadlessFigureDispatcher
+        dispatcher = HeadlessFigureDispatcher()
+        dispatcher.output_directory = None
+    else:
+        from qtpy.QtWidgets import QApplication, QTabWidget
+        from .qt.figures import FigureDispatcher
+        app = QApplication.instance() or QApplication(['bluesky_mpl-benchmarks'])
+        tabs = QTabWidget()
+        tabs.show()
+        dispatcher = FigureDispatcher(tabs.addTab)
+    _count_draws(dispatcher, draws)
+    router = event_model.RunRouter([dispatcher])
+
+    latencies = []
+    num_events = 0
+    wall_start = time.perf_counter()
+    clock_offset = None
+    for name, doc in documents:
+        if realtime and name in ('event', 'event_page'):
+            doc_time = doc['time'] if name == 'event' else doc['time'][-1]
+            if clock_offset is None:
+                clock_offset = time.time() - doc_time
+            delay = doc_time + clock_offset - time.time()
+            if delay > 0:
+                time.sleep(delay)
+        start = time.perf_counter()
+        router(name, doc)
+        if app is not None:
+            app.processEvents()
+        latencies.append(time.perf_counter() - start)
+        if name == 'event':
+            num_events += 1
+        elif name == 'event_page':
+            num_events += len(doc['seq_num'])
+    if app is not None:
+        # Let any scheduled repaints happen.
+        settle = time.perf_counter() + 0.2
+        while time.perf_counter() < settle:
+            app.processEvents()
+    elapsed = time.perf_counter() - wall_start
+
+    latencies = numpy.asarray(latencies)
+    p50, p90, p99 = numpy.percentile(latencies, [50, 90, 99])
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform != 'darwin':
+        max_rss *= 1024  # Linux reports kilobytes; macOS reports bytes.
+    return {'backend': backend,
+            'documents': len(latencies),
+            'events': num_events,
+            'elapsed': elapsed,
+            'documents_per_second': len(latencies) / elapsed,
+            'events_per_second': num_events / elapsed,
+            'latency_p50': p50,
+            'latency_p90': p90,
+            'latency_p99': p99,
+            'latency_max': latencies.max(),
+            'redraws': len(draws),
+            'peak_rss': max_rss}
+
+
+def format_result(result):
+    "Format the result of :func:`run_benchmark` as a table."
+    return '\n'.join([
+        f"backend               {result['backend']}",
+        f"documents             {result['documents']}",
+        f"events                {result['events']}",
+        f"elapsed               {result['elapsed']:.3f} s",
+        f"documents/s           {result['documents_per_second']:.1f}",
+        f"events/s              {result['events_per_second']:.1f}",
+        f"latency p50/p90/p99   {result['latency_p50'] * 1e3:.3f} / "
+        f"{result['latency_p90'] * 1e3:.3f} / {result['latency_p99'] * 1e3:.3f} ms",
+        f"latency max           {result['latency_max'] * 1e3:.3f} ms",
+        f"redraws               {result['redraws']}",
+        f"peak RSS              {result['peak_rss'] / 2**20:.1f} MiB"])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--kind', choices=KINDS, default='scalar')
+    parser.add_argument('--backend', choices=BACKENDS, default='headless')
+    parser.add_argument('--events', type=int, default=1000)
+    parser.add_argument('--page-size', type=int, default=1)
+    parser.add_argument('--fields', type=int, default=1)
+    parser.add_argument('--image-shape', type=int, nargs=2, default=(512, 512))
+    parser.add_argument('--grid-shape', type=int, nargs=2, default=(32, 32))
+    parser.add_argument('--rate', type=float, default=None,
+                        help="Events per second; implies --realtime")
+    parser.add_argument('--realtime', action='store_true',
+                        help="Send Events no faster than their timestamps")
+    args = parser.parse_args(argv)
+    if args.backend == 'qt' and not os.environ.get('DISPLAY'):
+        os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    documents = generate_documents(
+        args.kind, num_events=args.events, page_size=args.page_size,
+        num_fields=args.fields, image_shape=tuple(args.image_shape),
+        grid_shape=tuple(args.grid_shape), rate=args.rate)
+    result = run_benchmark(documents, backend=args.backend,
+                           realtime=args.realtime or args.rate is not None)
+    print(format_result(result))
+
+
+if __name__ == '__main__':
+    main()
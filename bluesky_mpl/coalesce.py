@@ -0,0 +1,134 @@
+import logging
+
+import event_model
+
+
+log = logging.getLogger('bluesky_mpl')
+
+
+class EventCoalescer:
+    """
+    Pass documents through, combining consecutive Events into EventPages.
+
+    Events from the same descriptor are buffered and released to the callback
+    as one EventPage when any of these happens:
+
+    * ``max_events`` Events have accumulated,
+    * an Event from a different descriptor or any other document arrives,
+    * ``interval`` seconds pass after the first buffered Event (if
+      ``call_later`` is given), or
+    * :meth:`flush` is called.
+
+    The order of the documents is preserved. All other documents, including
+    EventPages, are passed through unchanged.
+
+    Parameters
+    ----------
+    callback : callable
+        Expected signature ``f(name, doc)``
+    max_events : int, optional
+        Maximum number of Events per EventPage. Default is 1000.
+    interval : float, optional
+        Maximum time in seconds that an Event is held back. Only used if
+        ``call_later`` is given. Default is 0.05.
+    call_later : callable, optional
+        Expected signature ``f(delay, func)``. It must arrange for ``func()``
+        to be called after ``delay`` seconds on the same thread that calls
+        this object, e.g. using a Qt single-shot timer.
+    """
+    def __init__(self, callback, *, max_events=1000, interval=0.05, call_later=None):
+        self.callback = callback
+        self.max_events = max_events
+        self.interval = interval
+        self.call_later = call_later
+        self._events = []
+        # Incremented on each flush so that timers armed before it do nothing.
+        self._generation = 0
+
+    def __repr__(self):
+        return f"<{type(self).__name__} {self.callback!r}>"
+
+    def __call__(self, name, doc):
+        if name == 'event':
+            if self._events and self._events[0]['descriptor'] != doc['descriptor']:
+                self.flush()
+            if not self._events and self.call_later is not None:
+                generation = self._generation
+                self.call_later(self.interval, lambda: self._flush_if_current(generation))
+            self._events.append(doc)
+            if len(self._events) >= self.max_events:
+                self.flush()
+        else:
+            self.flush()
+            self.callback(name, doc)
+
+    def _flush_if_current(self, generation):
+        if generation == self._generation:
+            self.flush()
+
+    def flush(self):
+        "Release any buffered Events as one EventPage."
+        self._generation += 1
+        if not self._events:
+            return
+        events, self._events = self._events, []
+        self.callback('event_page', event_model.pack_event_page(*events))
+
+
+def fast_forward(documents):
+    """
+    Replay a completed run with all of its Events in one EventPage per stream.
+
+    The documents are read to the end first. If a 'stop' document is among
+    them, the run is complete, and it is replayed as: all the other documents
+    (start, descriptors, resources, datums, ...) in their original order, then
+    one EventPage per descriptor holding all of its Events in order, and
+    finally the stop document. Each artist then updates, and each Figure
+    redraws, once for the whole run instead of once per Event.
+
+    If there is no 'stop' document, the documents are passed through as they
+    came.
+
+    Parameters
+    ----------
+    documents : iterable
+        (name, doc) pairs for one run
+
+    Yields
+    ------
+    name, doc
+    """
+    documents = list(documents)
+    if not any(name == 'stop' for name, _ in documents):
+        yield from documents
+        return
+    # For each descriptor, a list of EventPages and of Events that have not
+    # been packed into one yet, in the order they arrived.
+    pages = {}
+    events = {}
+    stop = []
+    for name, doc in documents:
+        if name == 'event':
+            events.setdefault(doc['descriptor'], []).append(doc)
+        elif name == 'event_page':
+            _pack(pages, events, doc['descriptor'])
+            pages[doc['descriptor']].append(doc)
+        elif name == 'stop':
+            stop.append(doc)
+        else:
+            if name == 'descriptor':
+                pages.setdefault(doc['uid'], [])
+            yield name, doc
+    for descriptor in pages:
+        _pack(pages, events, descriptor)
+        if pages[descriptor]:
+            yield 'event_page', event_model.merge_event_pages(pages[descriptor])
+    for doc in stop:
+        yield 'stop', doc
+
+
+def _pack(pages, events, descriptor):
+    "Pack any pending Events from a descriptor into an EventPage."
+    pending = events.pop(descriptor, None)
+    if pending:
+        pages.setdefault(descriptor, []).append(event_model.pack_event_page(*pending))
@@ -45,5 +45,30 @@
 #c.FigureManager.factories = [LinePlotManager]
 #
 #c.LinePlotManager.omit_single_point_plot = True
+#
+## Draw only a pixel-width-aware reduced view of long scans, and redraw only
+## the data (not the axes) when new data arrives.
+#c.LinePlotManager.line_options = {'decimate': 'minmax', 'blit': True}
+#c.LatestFrameImageManager.imshow_options = {'blit': True}
+## For large area detector frames, draw a downsampled copy matched to the
+## size of the Axes on screen, cropped to the zoomed region.
+#c.LatestFrameImageManager.imshow_options = {'blit': True, 'lod': True}
+## Set the color limits from the 1st and 99th percentiles of recent frames,
+## ignoring hot pixels, and only redraw the colorbar for changes over 2%.
+#c.LatestFrameImageManager.imshow_options = {
+#    'clim_strategy': 'decaying_histogram',
+#    'clim_options': {'low': 1, 'high': 99, 'decay': 0.5},
+#    'clim_tolerance': 0.02}
+## Show the maximum projection of the frames in each EventPage, averaging the
+## stack of images in each Event.
+#c.LatestFrameImageManager.reducer_options = {'page': 'max', 'stack': 'mean'}
 #c.FigureManager.enabled = True
 #c.FigureManager.exclude_streams = set()
+#
+## Repaint all the Figures in a Viewer at no more than this many frames per
+## second, coalescing updates in between.
+#c.FigureDispatcher.max_fps = 20
+#
+## Record the time spent in each heuristic and artist. Print a report with
+##     from bluesky_mpl.profiling import profiler; print(profiler.report())
+#c.FigureDispatcher.profile = True
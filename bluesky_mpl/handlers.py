@@ -0,0 +1,218 @@
+"""
+Handlers for externally-stored data that read only what is displayed.
+
+The usual handlers read all of a Datum's data into memory when a document is
+filled. These instead return memory maps or :class:`LazyStack` objects,
+which read frames from the file only when they are indexed. The image
+heuristics index out the frames they display, so the rest are never read.
+
+They are registered by default with :class:`~bluesky_mpl.qt.viewer.Viewer`;
+see ``Viewer.handler_registry``. h5py and tifffile are only needed if data
+of the corresponding format is encountered.
+"""
+import numpy
+
+
+class LazyStack:
+    """
+    A read-only stack of frames that are read from storage when indexed.
+
+    Indexing with an integer reads one frame; indexing with a slice reads
+    those frames and stacks them. Anything else (including ``numpy.asarray``)
+    reads them all.
+
+    Parameters
+    ----------
+    read_frame : callable
+        Expected signature ``f(i) -> array``, reading the frame at index i
+    length : int
+        Number of frames
+    frame_shape : tuple, optional
+        If None, it is found by reading the first frame when needed.
+    dtype : numpy dtype, optional
+        If None, it is found by reading the first frame when needed.
+    read_range : callable, optional
+        Expected signature ``f(start, stop) -> array``, reading a contiguous
+        range of frames at once, if that is faster than one at a time
+    """
+    def __init__(self, read_frame, length, frame_shape=None, dtype=None, read_range=None):
+        self._read_frame = read_frame
+        self._length = length
+        self._frame_shape = None if frame_shape is None else tuple(frame_shape)
+        self._dtype = None if dtype is None else numpy.dtype(dtype)
+        self._read_range = read_range
+
+    def __repr__(self):
+        return f"<{type(self).__name__} shape={self.shape} dtype={self.dtype}>"
+
+    def __len__(self):
+        return self._length
+
+    def _inspect_first_frame(self):
+        frame = numpy.asarray(self._read_frame(0))
+        self._frame_shape = frame.shape
+        self._dtype = frame.dtype
+
+    @property
+    def shape(self):
+        if self._frame_shape is None:
+            self._inspect_first_frame()
+        return (self._length,) + self._frame_shape
+
+    @property
+    def ndim(self):
+        return len(self.shape)
+
+    @property
+    def dtype(self):
+        if self._dtype is None:
+            self._inspect_first_frame()
+        return self._dtype
+
+    def __getitem__(self, index):
+        if not isinstance(index, tuple):
+            index = (index,)
+        first, rest = index[0], index[1:]
+        if isinstance(first, (int, numpy.integer)):
+            i = range(self._length)[first]  # Normalizes and checks bounds.
+            frame = numpy.asarray(self._read_frame(i))
+            return frame[rest] if rest else frame
+        if first is Ellipsis:
+            first, rest = slice(None), index
+        indices = range(self._length)[first]
+        if not len(indices):
+            frames = numpy.empty((0,) + self.shape[1:], dtype=self.dtype)
+        elif self._read_range is not None and indices.step == 1:
+            frames = numpy.asarray(self._read_range(indices.start, indices.stop))
+        else:
+            frames = numpy.stack([numpy.asarray(self._read_frame(i)) for i in indices])
+        return frames[(slice(None),) + rest] if rest else frames
+
+    def __array__(self, dtype=None, copy=None):
+        return numpy.asarray(self[:], dtype=dtype)
+
+
+class NpyHandler:
+    """
+    Memory-map a whole .npy file (spec 'npy').
+
+    Parameters
+    ----------
+    fpath : str
+    mmap_mode : str, optional
+        Passed to ``numpy.load``. Default is 'r'.
+    """
+    specs = {'npy'}
+
+    def __init__(self, fpath, mmap_mode='r'):
+        self._fpath = fpath
+        self._mmap_mode = mmap_mode
+
+    def __call__(self):
+        return numpy.load(self._fpath, mmap_mode=self._mmap_mode)
+
+
+class NpyFrameWiseHandler:
+    """
+    Memory-map a .npy file holding one frame per Datum (spec 'npy_FRAMEWISE').
+
+    Parameters
+    ----------
+    fpath : str
+    mmap_mode : str, optional
+        Passed to ``numpy.load``. Default is 'r'.
+    """
+    specs = {'npy_FRAMEWISE'}
+
+    def __init__(self, fpath, mmap_mode='r'):
+        self._data = numpy.load(fpath, mmap_mode=mmap_mode)
+
+    def __call__(self, frame_no):
+        return self._data[frame_no]
+
+
+class AreaDetectorHDF5Handler:
+    """
+    Read an area detector's HDF5 file in chunks (spec 'AD_HDF5').
+
+    Each Datum gives a :class:`LazyStack` of ``frame_per_point`` frames, which
+    reads the frames from the file as they are indexed.
+
+    Parameters
+    ----------
+    filename : str
+    frame_per_point : int, optional
+        Default is 1.
+    """
+    specs = {'AD_HDF5'}
+    key = 'entry/data/data'
+
+    def __init__(self, filename, frame_per_point=1):
+        import h5py
+        self._file = h5py.File(filename, 'r')
+        self._dataset = self._file[self.key]
+        self._frame_per_point = frame_per_point
+
+    def __call__(self, point_number):
+        start = point_number * self._frame_per_point
+        stop = min(start + self._frame_per_point, len(self._dataset))
+        dataset = self._dataset
+        return LazyStack(
+            lambda i: dataset[start + i],
+            stop - start,
+            frame_shape=dataset.shape[1:],
+            dtype=dataset.dtype,
+            read_range=lambda first, last: dataset[start + first:start + last])
+
+    def close(self):
+        self._file.close()
+
+
+class AreaDetectorTiffHandler:
+    """
+    Read an area detector's TIFF files, one at a time (spec 'AD_TIFF').
+
+    Each Datum gives a :class:`LazyStack` of ``frame_per_point`` frames, one
+    per file, which reads a file when its frame is indexed. Files are memory
+    mapped where their layout allows.
+
+    Parameters
+    ----------
+    fpath : str
+    template : str
+        A %-style template, formatted with ``(fpath, filename, index)``
+    filename : str
+    frame_per_point : int, optional
+        Default is 1.
+    """
+    specs = {'AD_TIFF'}
+
+    def __init__(self, fpath, template, filename, frame_per_point=1):
+        self._fpath = fpath
+        self._template = template
+        self._filename = filename
+        self._frame_per_point = frame_per_point
+
+    def __call__(self, point_number):
+        start = point_number * self._frame_per_point
+        paths = [self._template % (self._fpath, self._filename, start + i)
+                 for i in range(self._frame_per_point)]
+        return LazyStack(lambda i: _read_tiff(paths[i]), len(paths))
+
+
+def _read_tiff(path):
+    import tifffile
+    try:
+        return tifffile.memmap(path, mode='r')
+    except ValueError:
+        # Compressed or otherwise not contiguous
+        return tifffile.imread(path)
+
+
+# The handlers that Viewer registers by default, by spec
+HANDLERS = {
+    'npy': 'bluesky_mpl.handlers.NpyHandler',
+    'npy_FRAMEWISE': 'bluesky_mpl.handlers.NpyFrameWiseHandler',
+    'AD_HDF5': 'bluesky_mpl.handlers.AreaDetectorHDF5Handler',
+    'AD_TIFF': 'bluesky_mpl.handlers.AreaDetectorTiffHandler',
+}
@@ -0,0 +1,203 @@
+"""
+Run the figure heuristics with no GUI, rendering off-screen with Agg.
+
+For example, to write a PNG of each figure at most every 5 seconds and at
+the end of each run:
+
+>>> from event_model import RunRouter
+>>> dispatcher = HeadlessFigureDispatcher(output_directory='/tmp/snapshots')
+>>> dispatcher.snapshot_interval = 5
+>>> RE.subscribe(RunRouter([dispatcher]))
+"""
+import logging
+import os
+import re
+import time
+
+from event_model import RunRouter
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+import matplotlib.image
+import numpy
+from traitlets import observe
+from traitlets.traitlets import Bool, Float, List, Unicode
+from traitlets.config import Configurable
+
+from .artists.render import FigureRenderer
+from .heuristics.grid import GridPlotManager
+from .heuristics.image import LatestFrameImageManager
+from .heuristics.line import LinePlotManager
+from .heuristics.utils import guess_dimensions
+from . import latency, profiling
+from .utils import load_config, skip_start
+
+
+log = logging.getLogger('bluesky_mpl')
+
+
+class SnapshotScheduler:
+    """
+    Render dirty Figures off-screen no more often than a given interval.
+
+    Redraw requests for a Figure rendered less than ``interval`` seconds ago
+    leave it dirty. It is rendered by a later request once the interval has
+    passed, or by :meth:`flush`.
+
+    Parameters
+    ----------
+    interval : float
+        Minimum time in seconds between renders of any one Figure.
+    on_render : callable
+        Expected signature ``f(renderer)``, called after each render
+    """
+    def __init__(self, interval, on_render):
+        self.interval = interval
+        self.on_render = on_render
+        self._dirty = {}  # Used as an ordered set of FigureRenderers.
+        self._last_render = {}
+
+    def schedule(self, renderer):
+        self._dirty[renderer] = None
+        now = time.monotonic()
+        if now - self._last_render.get(renderer, -numpy.inf) >= self.interval:
+            self._render(renderer, now)
+
+    def flush(self):
+        "Render every dirty Figure now."
+        now = time.monotonic()
+        for renderer in list(self._dirty):
+            self._render(renderer, now)
+
+    def _render(self, renderer, now):
+        del self._dirty[renderer]
+        self._last_render[renderer] = now
+        renderer.render()
+        self.on_render(renderer)
+
+
+class HeadlessFigureDispatcher(Configurable):
+    """
+    Encapsulate matplotlib Figures rendered off-screen, with no Qt.
+
+    This runs the same heuristics as
+    :class:`~bluesky_mpl.qt.figures.FigureDispatcher`, but draws to Agg
+    canvases. The rendered Figures can be written to PNG files in
+    ``output_directory``, no more often than every ``snapshot_interval``
+    seconds per Figure and once more at the end of each run, and the raw RGBA
+    buffer of the most recent render is available from :meth:`snapshot`.
+
+    Parameters
+    ----------
+    output_directory : str, optional
+        Where to write PNG files. If None (default), use the configured value
+        of ``output_directory``; if that is None too, write no files.
+    """
+    factories = List([
+        LinePlotManager,
+        GridPlotManager,
+        LatestFrameImageManager],
+        config=True)
+    enabled = Bool(True, config=True)
+    output_directory = Unicode(None, allow_none=True, config=True)
+    snapshot_interval = Float(1, config=True)
+    # Record the time spent in each factory and callback in
+    # bluesky_mpl.profiling.profiler.
+    profile = Bool(False, config=True)
+
+    def __init__(self, output_directory=None):
+        # Made first, so that _snapshot_interval_changed can update it.
+        self._scheduler = SnapshotScheduler(self.snapshot_interval, self._on_render)
+        self.update_config(load_config())
+        if output_directory is not None:
+            self.output_directory = output_directory
+        self._figures = {}
+        self._keys = {}  # maps Figure to key
+
+    @observe('snapshot_interval')
+    def _snapshot_interval_changed(self, change):
+        self._scheduler.interval = change['new']
+
+    @property
+    def figures(self):
+        "A dict mapping keys to Figures"
+        return dict(self._figures)
+
+    def get_figure(self, key, label, *args, **kwargs):
+        try:
+            return self._figures[key]
+        except KeyError:
+            return self._add_figure(key, label, *args, **kwargs)
+
+    def _add_figure(self, key, label, *args, **kwargs):
+        fig = Figure()
+        FigureCanvasAgg(fig)
+        fig.subplots()
+        fig.suptitle(label)
+        FigureRenderer.for_figure(fig).scheduler = self._scheduler
+        self._figures[key] = fig
+        self._keys[fig] = key
+        return fig
+
+    def snapshot(self, key):
+        """
+        Get the most recently rendered image of a Figure.
+
+        Returns
+        -------
+        rgba : array
+            A (height, width, 4) array of uint8
+        """
+        return numpy.array(self._figures[key].canvas.buffer_rgba())
+
+    def flush(self):
+        "Render (and write) every Figure with pending changes now."
+        self._scheduler.flush()
+
+    def filename(self, key):
+        "The name of the PNG file for a Figure, derived from its key"
+        parts = []
+        for part in key:
+            if isinstance(part, (tuple, list)):
+                parts.extend(map(str, part))
+            else:
+                parts.append(str(part))
+        return re.sub(r'[^\w.-]+', '_', '-'.join(parts)) + '.png'
+
+    def _on_render(self, renderer):
+        if self.output_directory is None:
+            return
+        key = self._keys[renderer.figure]
+        os.makedirs(self.output_directory, exist_ok=True)
+        path = os.path.join(self.output_directory, self.filename(key))
+        # Write the buffer that was just rendered rather than drawing again.
+        matplotlib.image.imsave(path, numpy.asarray(renderer.figure.canvas.buffer_rgba()))
+        log.debug("Wrote %s", path)
+
+    def __call__(self, name, start_doc):
+        if not self.enabled:
+            return [], []
+        dimensions = start_doc.get('hints', {}).get('dimensions', guess_dimensions(start_doc))
+        factories = [factory(self, dimensions) for factory in self.factories]
+        if self.profile:
+            factories = [profiling.profiler.wrap_factory(factory, figure_key=self._figure_key)
+                         for factory in factories]
+        rr = RunRouter(factories)
+        rr('start', start_doc)
+
+        def callback(name, doc):
+            latency.monitor.record_document('dispatch', name, doc)
+            with latency.monitor.updating(name, doc):
+                rr(name, doc)
+            if name == 'stop':
+                # Make sure the final state of the run is rendered.
+                self.flush()
+
+        callback = skip_start(callback)
+        if self.profile:
+            callback = profiling.profiler.wrap(callback, label=type(self).__name__)
+        return [callback], []
+
+    def _figure_key(self, callback):
+        "The key of the Figure that an artist draws in, or None"
+        ax = getattr(callback, 'ax', None)
+        return None if ax is None else self._keys.get(ax.figure)
@@ -0,0 +1,174 @@
+import logging
+
+import numpy
+from traitlets import default
+from traitlets.config import Configurable
+from traitlets.traitlets import Dict, Type
+
+from ..utils import load_config
+from .utils import hinted_fields
+
+log = logging.getLogger('bluesky_mpl')
+
+
+def positions_to_indices(positions, start, stop, num):
+    """
+    Map motor positions onto the indices of the nearest points of a lattice.
+
+    The lattice has ``num`` evenly-spaced points from ``start`` to ``stop``
+    inclusive, as in ``numpy.linspace(start, stop, num)``. Positions beyond the
+    ends are clipped to the first or last index.
+
+    Parameters
+    ----------
+    positions : array
+    start : float
+    stop : float
+    num : int
+
+    Returns
+    -------
+    indices : array of integers
+    """
+    positions = numpy.asarray(positions, dtype=float)
+    if num < 2 or start == stop:
+        return numpy.zeros(positions.shape, dtype=numpy.intp)
+    step = (stop - start) / (num - 1)
+    indices = numpy.rint((positions - start) / step)
+    return numpy.clip(indices, 0, num - 1).astype(numpy.intp)
+
+
+def seq_num_to_indices(seq_num, shape, snaking):
+    """
+    Map Event sequence numbers to (row, col) indices of a 2-D grid scan.
+
+    This is a fallback for when the motor readbacks are not available.
+
+    Parameters
+    ----------
+    seq_num : array
+        Starting from 1, as in Event documents
+    shape : tuple
+        (num_rows, num_cols), the number of points along the slow and fast axes
+    snaking : tuple
+        (slow_snakes, fast_snakes); if fast_snakes, odd rows run backward
+
+    Returns
+    -------
+    rows, cols : arrays of integers
+    """
+    _, num_cols = shape
+    i = numpy.asarray(seq_num, dtype=numpy.intp) - 1
+    rows, cols = numpy.divmod(i, num_cols)
+    if snaking[1]:
+        odd = rows % 2 == 1
+        cols[odd] = num_cols - 1 - cols[odd]
+    return rows, cols
+
+
+class GridPlotManager(Configurable):
+    """
+    Manage the grid plots for one FigureManager.
+
+    This applies to 2-D grid scans whose RunStart document records the
+    ``shape`` and ``extents`` of the grid, as bluesky's ``grid_scan`` does.
+    Each scalar hinted field in the dimensions' stream gets an image, with
+    the slow axis as rows and the fast axis as columns.
+    """
+    imshow_options = Dict({}, config=True)
+    grid_class = Type()
+
+    @default('grid_class')
+    def default_grid_class(self):
+        # By defining the default value of grid_class dynamically here, we
+        # avoid importing matplotlib if some non-matplotlib grid_class is
+        # specfied by configuration.
+        from ..artists.grid import Grid
+        return Grid
+
+    def __init__(self, fig_manager, dimensions):
+        self.update_config(load_config())
+        self.fig_manager = fig_manager
+        self.start_doc = None
+        self.dimensions = dimensions
+
+    def __call__(self, name, start_doc):
+        self.start_doc = start_doc
+        if len(self.dimensions) != 2:
+            return [], []
+        shape = start_doc.get('shape')
+        extents = start_doc.get('extents')
+        if shape is None or extents is None or len(shape) != 2 or len(extents) != 2:
+            log.debug("Cannot make a grid plot without 'shape' and 'extents' "
+                      "in the RunStart document.")
+            return [], []
+        return [], [self.subfactory]
+
+    def subfactory(self, name, descriptor_doc):
+        (slow_keys, stream_name), (fast_keys, _) = self.dimensions
+        if descriptor_doc.get('name') != stream_name:
+            return []
+        # For an "inner product" dimension, plot against the first field.
+        slow_key, fast_key = slow_keys[0], fast_keys[0]
+        shape = tuple(self.start_doc['shape'])
+        (slow_start, slow_stop), (fast_start, fast_stop) = self.start_doc['extents']
+        snaking = self.start_doc.get('snaking') or (False, False)
+
+        fields = set(hinted_fields(descriptor_doc))
+        fields -= set(slow_keys) | set(fast_keys)
+        # Filter out the fields with a data type or shape that we cannot
+        # represent as a grid.
+        for field in list(fields):
+            dtype = descriptor_doc['data_keys'][field]['dtype']
+            if dtype not in ('number', 'integer'):
+                fields.discard(field)
+            ndim = len(descriptor_doc['data_keys'][field]['shape'] or [])
+            if ndim != 0:
+                fields.discard(field)
+
+        def cell_indices(event_page):
+            """
+            Map the motor readbacks in an EventPage to (row, col) grid cells.
+            """
+            data = event_page['data']
+            if slow_key in data and fast_key in data:
+                rows = positions_to_indices(data[slow_key], slow_start, slow_stop, shape[0])
+                cols = positions_to_indices(data[fast_key], fast_start, fast_stop, shape[1])
+                return rows, cols
+            return seq_num_to_indices(event_page['seq_num'], shape, snaking)
+
+        # Place the center of each cell on its lattice point.
+        half_row = (slow_stop - slow_start) / max(shape[0] - 1, 1) / 2
+        half_col = (fast_stop - fast_start) / max(shape[1] - 1, 1) / 2
+        extent = (fast_start - half_col, fast_stop + half_col,
+                  slow_start - half_row, slow_stop + half_row)
+
+        callbacks = []
+        for I_key in sorted(fields):
+            figure_label = f'{I_key} Grid'
+            fig = self.fig_manager.get_figure(
+                ('grid', slow_key, fast_key, I_key), figure_label, 1)
+            ax, *_possible_colorbar = fig.axes
+
+            log.debug('plot %s on a %r grid of %s and %s',
+                      I_key, shape, slow_key, fast_key)
+
+            def func(event_page, I_key=I_key):
+                """
+                Extract grid co-ordinates and intensities out of an EventPage.
+                """
+                rows, cols = cell_indices(event_page)
+                return rows, cols, event_page['data'][I_key]
+
+            options = {'extent': extent, 'origin': 'lower', 'aspect': 'auto'}
+            options.update(self.imshow_options)
+            grid = self.grid_class(func, shape, ax=ax, **options)
+            ax.set_title(I_key)
+            ax.set_xlabel(fast_key)
+            ax.set_ylabel(slow_key)
+            callbacks.append(grid)
+
+        for callback in callbacks:
+            callback('start', self.start_doc)
+            callback('descriptor', descriptor_doc)
+        return callbacks
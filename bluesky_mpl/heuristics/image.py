@@ -1,4 +1,5 @@
 import functools
+import inspect
 import logging
 
 import numpy
@@ -11,49 +12,216 @@ from ..utils import load_config, Callable
 log = logging.getLogger('bluesky_mpl')
 
 
-def first_frame(event_page, image_key):
+PAGE_REDUCTIONS = ('last', 'mean', 'max')
+STACK_REDUCTIONS = ('sum', 'mean', 'max', 'last')
+
+
+def _accumulator_dtype(dtype, how):
+    """
+    Choose the dtype to reduce in: the input's own for max and floats, and
+    the narrowest that will not overflow for sums and means of integers.
+    """
+    dtype = numpy.dtype(dtype)
+    if how == 'max':
+        return dtype
+    if dtype.kind == 'f':
+        return numpy.promote_types(dtype, numpy.float32)
+    if how == 'mean':
+        return numpy.dtype(numpy.float32 if dtype.itemsize <= 2 else numpy.float64)
+    return numpy.dtype(numpy.uint64 if dtype.kind == 'u' else numpy.int64)
+
+
+def _materialize(data):
+    "Turn array-like data, which may be lazy (e.g. dask), into a numpy array."
+    if hasattr(data, 'compute'):
+        data = data.compute()
+    return numpy.asarray(data)
+
+
+def _ndim(data):
+    "The number of dimensions of array-like data, without reading it if possible."
+    ndim = getattr(data, 'ndim', None)
+    if ndim is not None:
+        return ndim
+    if isinstance(data, (list, tuple)):
+        # A list with an entry per Event, as in an EventPage
+        return 1 + (_ndim(data[0]) if len(data) else 0)
+    return numpy.ndim(_materialize(data))
+
+
+class FrameReducer:
+    """
+    Reduce the image data in an EventPage to one frame.
+
+    Image data in an EventPage has the axes (event, y, x), or (event,
+    num_images, y, x) if each Event holds a stack of images. The stack in
+    each Event is reduced first, then the Events in the page.
+
+    Intermediate results, such as the reduced stack of each Event, are
+    written into a scratch buffer that is reused from one page to the next,
+    instead of allocating new full-size arrays each time. The returned frame
+    is never that buffer: it is a new array, or, where no reduction is needed
+    (such as 'last'), a view of the data. So it may be kept, or handed to
+    another thread, while later pages are reduced.
+
+    The data may be a list with an entry per Event, and the entries, or the
+    whole, may be lazy: dask arrays, memory maps, or anything else that can
+    be sliced without reading all of it, such as
+    :class:`~bluesky_mpl.handlers.LazyStack`. Only the frames that are needed
+    are sliced out and read, and they are reduced ``chunk_size`` frames at a
+    time, so the whole page is never in memory at once.
+
+    Parameters
+    ----------
+    page : {'last', 'mean', 'max'}, optional
+        How to reduce the Events in a page: take the last one, the mean or
+        the maximum projection. Default is 'last'.
+    stack : {'sum', 'mean', 'max', 'last'}, optional
+        How to reduce the stack of images in each Event. Default is 'sum'.
+    chunk_size : int, optional
+        Number of frames of lazy data to read at a time. Default is 16.
+    """
+    def __init__(self, page='last', stack='sum', chunk_size=16):
+        if page not in PAGE_REDUCTIONS:
+            raise ValueError(f"page must be one of {PAGE_REDUCTIONS}, not {page!r}")
+        if stack not in STACK_REDUCTIONS:
+            raise ValueError(f"stack must be one of {STACK_REDUCTIONS}, not {stack!r}")
+        self.page = page
+        self.stack = stack
+        self.chunk_size = chunk_size
+        self._scratch = {}  # maps slot to a reused buffer
+
+    def __repr__(self):
+        return f"{type(self).__name__}(page={self.page!r}, stack={self.stack!r})"
+
+    def __call__(self, data):
+        ndim = _ndim(data)
+        if ndim == 3:
+            frame = self._reduce(data, self.page)
+        elif ndim == 4:
+            if self.page == 'last' or len(data) == 1:
+                # Only the stack of the last Event is needed.
+                frame = self._reduce(data[-1], self.stack)
+            elif isinstance(data, numpy.ndarray):
+                stacked = self._reduce(data.swapaxes(0, 1), self.stack, 'stacked')
+                frame = self._reduce(stacked, self.page)
+            else:
+                # Reduce one Event's stack at a time. Each is added to the
+                # frame before the next overwrites the scratch buffer.
+                frames = (self._reduce(stack, self.stack, 'stacked') for stack in data)
+                frame = self._accumulate(frames, len(data), self.page, stacked=False)
+        else:
+            raise ValueError(
+                f'The number of dimensions must be 3 or 4, but received array '
+                f'has {ndim} number of dimensions.')
+        return _materialize(frame)
+
+    def _reduce(self, data, how, slot=None):
+        """
+        Reduce along the first axis into the scratch buffer for slot, or into
+        a new array if slot is None.
+        """
+        if how == 'last' or len(data) == 1:
+            return data[-1]
+        if isinstance(data, numpy.ndarray):
+            # This includes memory maps, which numpy reads through as it goes.
+            chunks = [data]
+        else:
+            chunks = (data[i:i + self.chunk_size]
+                      for i in range(0, len(data), self.chunk_size))
+        return self._accumulate(chunks, len(data), how, slot)
+
+    def _accumulate(self, parts, count, how, slot=None, stacked=True):
+        """
+        Combine parts into the scratch buffer for slot, or into a new array.
+
+        Each part is a stack of frames if stacked is True, or else one frame.
+        """
+        out = None
+        for part in parts:
+            part = _materialize(part)
+            if not stacked:
+                part = part[numpy.newaxis]
+            if out is None:
+                dtype = _accumulator_dtype(part.dtype, how)
+                out = self._buffer(slot, part.shape[1:], dtype)
+                if how == 'max':
+                    numpy.max(part, axis=0, out=out)
+                else:
+                    numpy.sum(part, axis=0, dtype=dtype, out=out)
+            elif how == 'max':
+                numpy.maximum(out, part[0] if len(part) == 1 else part.max(axis=0), out=out)
+            else:
+                out += part[0] if len(part) == 1 else part.sum(axis=0, dtype=out.dtype)
+        if how == 'mean':
+            out /= count
+        return out
+
+    def _buffer(self, slot, shape, dtype):
+        if slot is None:
+            return numpy.empty(shape, dtype)
+        buffer = self._scratch.get(slot)
+        if buffer is None or buffer.shape != shape or buffer.dtype != dtype:
+            buffer = self._scratch[slot] = numpy.empty(shape, dtype)
+        return buffer
+
+
+def first_frame(event_page, image_key, reducer=None):
     """
     Extract the first frame image data to plot out of an EventPage.
+
+    If the Events hold stacks of images, they are reduced by ``reducer``, a
+    :class:`FrameReducer`, which by default sums them.
     """
     if event_page['seq_num'][0] == 1:
-        data = numpy.asarray(event_page['data'][image_key])
-        log.debug('Image from %s has shape %r', image_key, data.shape)
-        if data.ndim == 3:
-            # Axes are event axis, y, x. Slice out the first event.
-            return data[0, ...]
-        elif data.ndim == 4:
-            # Axes are event axis, 'num_images' stack, y, x.
-            # Slice out the first event and sum along 'num_images' stack.
-            return data[0, ...].sum(0)
-        else:
+        # This may be lazy; leave it to the reducer to read what it needs.
+        data = event_page['data'][image_key]
+        ndim = _ndim(data)
+        log.debug('Image from %s has %d dimensions', image_key, ndim)
+        if ndim not in (3, 4):
             raise ValueError(
                 f'The number of dimensions for the image_key "{image_key}" '
                 f'must be 3 or 4 for event page {event_page}, but received array '
-                f'has {data.ndim} number of dimensions.')
+                f'has {ndim} number of dimensions.')
+        if reducer is None:
+            reducer = FrameReducer()
+        # Axes are event axis, ('num_images' stack,) y, x. Keep only the
+        # first event.
+        return reducer(data[:1])
     else:
         return None
 
 
-def latest_frame(event_page, image_key):
+def latest_frame(event_page, image_key, reducer=None):
     """
     Extract the most recent frame of image data to plot out of an EventPage.
+
+    The Events in the page, and the stacks of images in each Event if there
+    are any, are reduced by ``reducer``, a :class:`FrameReducer`, which by
+    default takes the last Event and sums its stack.
     """
-    data = numpy.asarray(event_page['data'][image_key])
+    # This may be lazy; leave it to the reducer to read what it needs.
+    data = event_page['data'][image_key]
+    ndim = _ndim(data)
     if event_page['seq_num'][0] == 1:
         # Just log once per event stream.
-        log.debug('Image from %s has shape %r', image_key, data.shape)
-    if data.ndim == 3:
-        # Axes are event axis, y, x. Slice out the first event.
-        return data[0, ...]
-    elif data.ndim == 4:
-        # Axes are event axis, 'num_images' stack, y, x.
-        # Slice out the first event and sum along 'num_images' stack.
-        return data[0, ...].sum(0)
-    else:
+        log.debug('Image from %s has %d dimensions', image_key, ndim)
+    if ndim not in (3, 4):
         raise ValueError(
             f'The number of dimensions for the image_key "{image_key}" '
-            f'must be 3 for event page {event_page}, but received array '
-            f'has {data.ndim} number of dimensions.')
+            f'must be 3 or 4 for event page {event_page}, but received array '
+            f'has {ndim} number of dimensions.')
+    if reducer is None:
+        reducer = FrameReducer()
+    # Axes are event axis, ('num_images' stack,) y, x.
+    return reducer(data)
+
+
+def _accepts_reducer(func):
+    try:
+        return 'reducer' in inspect.signature(func).parameters
+    except (TypeError, ValueError):
+        return False
 
 
 class BaseImageManager(Configurable):
@@ -61,6 +229,9 @@ class BaseImageManager(Configurable):
     Manage the image plots for one FigureManager.
     """
     imshow_options = Dict({}, config=True)
+    # Passed to FrameReducer, if func accepts a reducer, for example
+    # {'page': 'max', 'stack': 'mean'}
+    reducer_options = Dict({}, config=True)
     image_class = Type()
 
     @default('image_class')
@@ -68,7 +239,7 @@ class BaseImageManager(Configurable):
         # By defining the default value of image_class dynamically here, we
         # avoid importing matplotlib if some non-matplotlib image_class is
         # specfied by configuration.
-        from ..artists.mpl.image import Image
+        from ..artists.image import Image
         return Image
 
     def __init__(self, fig_manager, dimensions):
@@ -140,6 +311,9 @@ class BaseImageManager(Configurable):
             log.debug('plot image %s', image_key)
 
             func = functools.partial(self.func, image_key=image_key)
+            if _accepts_reducer(self.func):
+                # Give each image its own reducer, with its own buffers.
+                func = functools.partial(func, reducer=FrameReducer(**self.reducer_options))
 
             image = self.image_class(func, shape=shape, ax=ax, **self.imshow_options)
             callbacks.append(image)
@@ -3,7 +3,7 @@ import logging
 import numpy
 from traitlets import default
 from traitlets.config import Configurable
-from traitlets.traitlets import Bool, Type
+from traitlets.traitlets import Bool, Dict, Type
 
 from ..utils import load_config
 from .utils import hinted_fields
@@ -16,6 +16,7 @@ class LinePlotManager(Configurable):
     Manage the line plots for one FigureManager.
     """
     omit_single_point_plot = Bool(True, config=True)
+    line_options = Dict({}, config=True)
     line_class = Type()
 
     @default('line_class')
@@ -93,7 +94,7 @@ class LinePlotManager(Configurable):
                             x_data = event_page['data'][x_key]
                         return x_data, y_data
 
-                    line = self.line_class(func, ax=ax)
+                    line = self.line_class(func, ax=ax, **self.line_options)
                     callbacks.append(line)
 
                 if fields and fig.axes:
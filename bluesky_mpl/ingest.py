@@ -0,0 +1,190 @@
+import collections
+import logging
+import threading
+import time
+
+
+log = logging.getLogger('bluesky_mpl')
+
+DROP_POLICIES = ('block', 'drop_oldest_events', 'latest_image')
+_EVENT_NAMES = ('event', 'event_page')
+
+
+class DocumentBatcher:
+    """
+    Collect (name, doc) pairs and pass them on in batches.
+
+    A batch is passed to the callback, as a list of (name, doc) pairs in the
+    order they arrived, once ``batch_size`` documents have accumulated or
+    ``batch_interval`` seconds have passed since the first of them arrived,
+    whichever comes first.
+
+    This is not thread-safe: documents must be added, and ``call_later`` must
+    call back, on one thread (or event loop).
+
+    Parameters
+    ----------
+    callback : callable
+        Expected signature ``f(batch)``
+    batch_size : int
+    batch_interval : float, optional
+        Default is 0.05.
+    call_later : callable, optional
+        Expected signature ``f(delay, func) -> handle``, scheduling func to be
+        called after delay seconds and returning a handle with a ``cancel()``
+        method, such as ``asyncio.AbstractEventLoop.call_later``. If None,
+        batches are only passed on when full or when :meth:`flush` is
+        called.
+    """
+    def __init__(self, callback, batch_size, batch_interval=0.05, call_later=None):
+        self.callback = callback
+        self.batch_size = batch_size
+        self.batch_interval = batch_interval
+        self.call_later = call_later
+        self._batch = []
+        self._batch_started = None
+        self._flush_handle = None
+
+    def __call__(self, name, doc):
+        if not self._batch:
+            self._batch_started = time.monotonic()
+            if self.call_later is not None:
+                self._flush_handle = self.call_later(self.batch_interval, self.flush)
+        self._batch.append((name, doc))
+        if len(self._batch) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        "Pass on whatever has accumulated now."
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if not self._batch:
+            return
+        batch, self._batch = self._batch, []
+        log.debug("Flushing batch of %d documents after %.3f s",
+                  len(batch), time.monotonic() - self._batch_started)
+        self.callback(batch)
+
+
+class DocumentQueue:
+    """
+    A thread-safe, bounded queue of (name, doc) pairs.
+
+    This sits between a thread receiving documents and the GUI thread that
+    consumes them, so that a consumer that falls behind cannot make memory
+    grow without limit. What happens when the queue is full is set by the
+    policy:
+
+    * 'block' --- :meth:`put` waits for the consumer to make room. This pushes
+      back on the producer; for a 0MQ subscriber, messages then queue up (and
+      eventually get dropped) in the socket instead of in this process.
+    * 'drop_oldest_events' --- the oldest queued Event or EventPage is
+      discarded to make room. Other documents (start, descriptor, resource,
+      datum, stop, ...) are never dropped, so the run structure stays valid.
+    * 'latest_image' --- like 'drop_oldest_events', but also, whenever an Event
+      or EventPage arrives from a descriptor that has image fields (data keys
+      with two or more dimensions), any older ones still queued from that
+      descriptor are discarded, because only the latest frame will be shown.
+      Note that this discards any scalar fields in those Events too.
+
+    The number of documents dropped, by document name, is kept in
+    :attr:`dropped`.
+
+    Parameters
+    ----------
+    maxsize : int, optional
+        Default is 10000.
+    policy : {'block', 'drop_oldest_events', 'latest_image'}, optional
+        Default is 'block'.
+    """
+    def __init__(self, maxsize=10000, policy='block'):
+        if policy not in DROP_POLICIES:
+            raise ValueError(f"policy must be one of {DROP_POLICIES}, not {policy!r}")
+        self.maxsize = maxsize
+        self.policy = policy
+        self.dropped = collections.Counter()
+        self._queue = collections.deque()
+        self._not_full = threading.Condition()
+        self._image_descriptors = set()
+        # Number of queued Events(Pages) for each descriptor with image fields
+        self._queued_image_events = collections.Counter()
+
+    def __len__(self):
+        return len(self._queue)
+
+    def __repr__(self):
+        return (f"<{type(self).__name__} {len(self)}/{self.maxsize} "
+                f"policy={self.policy!r} dropped={dict(self.dropped)}>")
+
+    def put(self, name, doc):
+        "Add a document, waiting for room or dropping documents as the policy says."
+        with self._not_full:
+            if name == 'descriptor':
+                for data_key in doc['data_keys'].values():
+                    if len(data_key.get('shape') or []) >= 2:
+                        self._image_descriptors.add(doc['uid'])
+                        break
+            elif (self.policy == 'latest_image' and name in _EVENT_NAMES
+                    and self._queued_image_events[doc['descriptor']]):
+                self._drop_where(
+                    lambda item: (item[0] in _EVENT_NAMES
+                                  and item[1]['descriptor'] == doc['descriptor']),
+                    count=self._queued_image_events[doc['descriptor']])
+            if self.policy == 'block':
+                while len(self._queue) >= self.maxsize:
+                    self._not_full.wait()
+            elif len(self._queue) >= self.maxsize:
+                # Make room by dropping the oldest Event(Page), if there is one.
+                # If the queue holds only structural documents, it may exceed
+                # maxsize rather than lose them.
+                self._drop_where(lambda item: item[0] in _EVENT_NAMES, count=1)
+            self._queue.append((name, doc))
+            self._count_image_event(name, doc, 1)
+
+    def _count_image_event(self, name, doc, increment):
+        if name in _EVENT_NAMES and doc['descriptor'] in self._image_descriptors:
+            self._queued_image_events[doc['descriptor']] += increment
+
+    def _drop_where(self, predicate, count):
+        "Drop up to count of the oldest queued documents matching predicate."
+        indices = []
+        for i, item in enumerate(self._queue):
+            if predicate(item):
+                indices.append(i)
+                if len(indices) >= count:
+                    break
+        for i in reversed(indices):
+            name, doc = self._queue[i]
+            del self._queue[i]
+            self._count_image_event(name, doc, -1)
+            self.dropped[name] += 1
+        if indices:
+            log.debug("Dropped %d documents; %r dropped so far",
+                      len(indices), dict(self.dropped))
+
+    def get_batch(self, max_items=None):
+        """
+        Remove and return queued documents, oldest first, without waiting.
+
+        Parameters
+        ----------
+        max_items : int, optional
+            If None (default), return everything in the queue.
+
+        Returns
+        -------
+        batch : list
+            A list of (name, doc) pairs, possibly empty
+        """
+        with self._not_full:
+            if max_items is None or max_items >= len(self._queue):
+                batch = list(self._queue)
+                self._queue.clear()
+                self._queued_image_events.clear()
+            else:
+                batch = [self._queue.popleft() for _ in range(max_items)]
+                for name, doc in batch:
+                    self._count_image_event(name, doc, -1)
+            self._not_full.notify_all()
+        return batch
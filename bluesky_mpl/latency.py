@@ -0,0 +1,214 @@
+"""
+Measure how far behind the data the plots are.
+
+The lag of an Event is the time elapsed since its own ``time`` field. It is
+recorded at each stage of the path from the data source to the screen:
+
+* 'receive' --- the document arrived in this process (ConsumerThread)
+* 'dispatch' --- it reached a figure dispatcher, on the GUI thread
+* 'update' --- the artists have been updated with it
+* 'draw' --- a redraw showing it has been drawn on the canvas
+
+Recording is off by default. To turn it on and look at the results:
+
+>>> from bluesky_mpl.latency import monitor
+>>> monitor.enabled = True
+>>> ...
+>>> monitor.summary()['draw']
+{'count': 1000, 'mean': 0.061, 'p50': 0.052, 'p90': 0.098, 'p99': 0.131, 'max': 0.2}
+>>> counts, edges = monitor.histogram('draw')
+
+The lag includes any offset between the clocks of the machine that produced
+the data and this one.
+"""
+import collections
+import contextlib
+import threading
+import time
+
+import numpy
+
+
+STAGES = ('receive', 'dispatch', 'update', 'draw')
+
+
+def event_times(name, doc):
+    """
+    Get the 'time' of each Event in a document.
+
+    Returns
+    -------
+    times : array or None
+        None if the document is not an Event or EventPage
+    """
+    if name == 'event':
+        return numpy.array([doc['time']], dtype=float)
+    if name == 'event_page':
+        return numpy.asarray(doc['time'], dtype=float)
+    return None
+
+
+def document_key(doc):
+    "The uid of an Event, or of the first Event in an EventPage"
+    uid = doc.get('uid')
+    if isinstance(uid, list):
+        uid = uid[0] if uid else None
+    return id(doc) if uid is None else uid
+
+
+class LatencyMonitor:
+    """
+    Collect the lag of Events at each stage, as histograms and rolling windows.
+
+    Parameters
+    ----------
+    window : int, optional
+        Number of most recent lags per stage that :meth:`summary` describes.
+        Default is 10000.
+    bins : array, optional
+        Histogram bin edges, in seconds. Lags outside of them are counted in
+        the first or last bin. Default is 10 logarithmic bins per decade from
+        100 microseconds to 1000 seconds.
+    enabled : boolean, optional
+        Default is False.
+    """
+    def __init__(self, window=10000, bins=None, enabled=False):
+        if bins is None:
+            bins = numpy.logspace(-4, 3, 71)
+        self.window = window
+        self.bins = numpy.asarray(bins, dtype=float)
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.reset()
+
+    def __repr__(self):
+        return f"<{type(self).__name__} enabled={self.enabled}>"
+
+    def reset(self):
+        "Discard everything recorded so far."
+        with self._lock:
+            self._counts = {stage: numpy.zeros(len(self.bins) - 1, dtype=int)
+                            for stage in STAGES}
+            self._recent = {stage: collections.deque(maxlen=self.window)
+                            for stage in STAGES}
+
+    def record(self, stage, times, now=None):
+        """
+        Record the lag of Events with the given times at a stage.
+
+        Parameters
+        ----------
+        stage : {'receive', 'dispatch', 'update', 'draw'}
+        times : array
+            The Events' 'time' fields
+        now : float, optional
+            Default is ``time.time()``.
+        """
+        if not self.enabled or times is None or not len(times):
+            return
+        if now is None:
+            now = time.time()
+        lags = now - numpy.asarray(times, dtype=float)
+        indices = numpy.clip(numpy.searchsorted(self.bins, lags, side='right') - 1,
+                             0, len(self.bins) - 2)
+        with self._lock:
+            numpy.add.at(self._counts[stage], indices, 1)
+            self._recent[stage].extend(lags.tolist())
+
+    def record_document(self, stage, name, doc):
+        "Record the lag of the Events in a document, if it has any."
+        if self.enabled:
+            self.record(stage, event_times(name, doc))
+
+    @contextlib.contextmanager
+    def updating(self, name, doc, record=True):
+        """
+        Mark a document as the one being applied to the artists on this thread.
+
+        While in this context, :meth:`current_document` returns the times of
+        its Events, so that redraws requested during the update can be
+        attributed to them. On exit, the 'update' stage is recorded, unless
+        ``record`` is False.
+        """
+        if not self.enabled:
+            yield
+            return
+        times = event_times(name, doc)
+        current = None if times is None else (document_key(doc), times)
+        previous = getattr(self._local, 'current', None)
+        self._local.current = current
+        try:
+            yield
+        finally:
+            self._local.current = previous
+        if record:
+            self.record('update', times)
+
+    def current_document(self):
+        """
+        The document being applied on this thread, as ``(key, times)``, or None
+
+        The key identifies the document, so that several redraws requested for
+        it can be counted once.
+        """
+        if not self.enabled:
+            return None
+        return getattr(self._local, 'current', None)
+
+    def current_times(self):
+        "The times of the Events being applied on this thread, or None"
+        current = self.current_document()
+        return None if current is None else current[1]
+
+    def histogram(self, stage):
+        """
+        Get the histogram of all the lags recorded at a stage.
+
+        Returns
+        -------
+        counts, bin_edges : arrays
+        """
+        with self._lock:
+            return self._counts[stage].copy(), self.bins.copy()
+
+    def summary(self, stage=None):
+        """
+        Describe the most recent lags, in seconds.
+
+        Parameters
+        ----------
+        stage : str, optional
+            If None (default), return a dict mapping each stage to its summary.
+
+        Returns
+        -------
+        summary : dict
+            With keys 'count', 'mean', 'p50', 'p90', 'p99' and 'max'. All but
+            the count are None if nothing has been recorded.
+        """
+        if stage is None:
+            return {stage: self.summary(stage) for stage in STAGES}
+        with self._lock:
+            lags = numpy.array(self._recent[stage])
+        if not len(lags):
+            return {'count': 0, 'mean': None, 'p50': None, 'p90': None,
+                    'p99': None, 'max': None}
+        p50, p90, p99 = numpy.percentile(lags, [50, 90, 99])
+        return {'count': len(lags), 'mean': lags.mean(), 'p50': p50, 'p90': p90,
+                'p99': p99, 'max': lags.max()}
+
+    def format_summary(self):
+        "A one-line description of the median and 99th percentile lags"
+        parts = []
+        for stage, summary in self.summary().items():
+            if summary['count']:
+                parts.append(f"{stage} {summary['p50'] * 1e3:.0f}/"
+                             f"{summary['p99'] * 1e3:.0f} ms")
+        if not parts:
+            return "Latency (p50/p99): no data"
+        return "Latency (p50/p99): " + ", ".join(parts)
+
+
+# The monitor used throughout bluesky_mpl
+monitor = LatencyMonitor()
@@ -0,0 +1,204 @@
+"""
+Time the callbacks and factories that documents are dispatched to.
+
+Documents pass through several layers of routers and factories on their way
+to the artists. To find out which of them is slow, turn on profiling in the
+config file:
+
+    c.FigureDispatcher.profile = True
+
+and then, at any time, print a report of the time spent in each one, keyed
+by its class and by the key of the Figure it draws in (if any):
+
+>>> from bluesky_mpl.profiling import profiler
+>>> print(profiler.report())
+
+With ``c.FigureDispatcher.offload_compute = True`` as well, the time
+recorded for each artist is only the time taken to queue its documents. The
+compute and apply phases happen later, outside of the call that is timed.
+"""
+import inspect
+import threading
+import time
+
+
+SORT_KEYS = ('total', 'mean', 'max', 'calls')
+
+
+def describe(func):
+    "A short label for a callable: the name of its class or of the function"
+    self = getattr(func, '__self__', None)
+    if self is not None:
+        return f"{type(self).__qualname__}.{func.__name__}"
+    if hasattr(func, '__qualname__'):
+        return func.__qualname__
+    return type(func).__qualname__
+
+
+class ProfiledCallback:
+    """
+    Wrap a callback, recording the time spent in each call to it.
+
+    Parameters
+    ----------
+    callback : callable
+    profiler : CallbackProfiler
+    key : tuple
+        The key to record times under
+    """
+    def __init__(self, callback, profiler, key):
+        self.callback = callback
+        self.profiler = profiler
+        self.key = key
+
+    def __repr__(self):
+        return f"<{type(self).__name__} {self.callback!r}>"
+
+    def __call__(self, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return self.callback(*args, **kwargs)
+        finally:
+            self.profiler.record(self.key, time.perf_counter() - start)
+
+
+class CallbackProfiler:
+    """
+    Accumulate the number of calls to and wall time spent in callbacks.
+
+    Times are keyed by a ``(label, figure_key)`` pair, where ``label``
+    describes the callback (see :func:`describe`) and ``figure_key`` is the key
+    of the Figure it draws in, or None.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {}  # maps key to [calls, total, max]
+
+    def __repr__(self):
+        return f"<{type(self).__name__} ({len(self._stats)} callbacks)>"
+
+    def reset(self):
+        "Discard everything recorded so far."
+        with self._lock:
+            self._stats.clear()
+
+    def record(self, key, elapsed):
+        "Record one call, taking elapsed seconds, under key."
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                self._stats[key] = [1, elapsed, elapsed]
+            else:
+                stats[0] += 1
+                stats[1] += elapsed
+                stats[2] = max(stats[2], elapsed)
+
+    def wrap(self, callback, *, label=None, figure_key=None):
+        """
+        Wrap a callback so that calls to it are recorded.
+
+        Parameters
+        ----------
+        callback : callable
+        label : str, optional
+            Default is given by :func:`describe`.
+        figure_key : callable, optional
+            Expected signature ``f(callback) -> key``, giving the key of the
+            Figure that the callback draws in, or None
+
+        Returns
+        -------
+        wrapped : ProfiledCallback
+        """
+        # Look through wrappers, such as OffloadedCallback, that set
+        # __wrapped__ to identify the underlying callback.
+        target = inspect.unwrap(callback)
+        if label is None:
+            label = describe(target)
+        key = (label, None if figure_key is None else figure_key(target))
+        return ProfiledCallback(callback, self, key)
+
+    def wrap_factory(self, factory, *, figure_key=None):
+        """
+        Wrap a RunRouter factory so that it, its subfactories and every
+        callback they make are recorded.
+
+        Parameters
+        ----------
+        factory : callable
+            A RunRouter factory, with the signature ``f(name, start_doc)`` and
+            returning ``(callbacks, subfactories)``
+        figure_key : callable, optional
+            See :meth:`wrap`.
+
+        Returns
+        -------
+        wrapped_factory : callable
+        """
+        timed_factory = self.wrap(factory)
+
+        def wrapped_factory(name, start_doc):
+            callbacks, subfactories = timed_factory(name, start_doc)
+            return ([self.wrap(callback, figure_key=figure_key) for callback in callbacks],
+                    [self._wrap_subfactory(subfactory, figure_key)
+                     for subfactory in subfactories])
+
+        return wrapped_factory
+
+    def _wrap_subfactory(self, subfactory, figure_key):
+        timed_subfactory = self.wrap(subfactory)
+
+        def wrapped_subfactory(name, descriptor_doc):
+            return [self.wrap(callback, figure_key=figure_key)
+                    for callback in timed_subfactory(name, descriptor_doc)]
+
+        return wrapped_subfactory
+
+    def stats(self, sort='total'):
+        """
+        Get the statistics for each key, slowest first.
+
+        Parameters
+        ----------
+        sort : {'total', 'mean', 'max', 'calls'}, optional
+            Default is 'total'.
+
+        Returns
+        -------
+        stats : list
+            A list of dicts with keys 'label', 'figure_key', 'calls', 'total',
+            'mean' and 'max', where the times are in seconds
+        """
+        if sort not in SORT_KEYS:
+            raise ValueError(f"sort must be one of {SORT_KEYS}, not {sort!r}")
+        with self._lock:
+            items = [(key, list(stats)) for key, stats in self._stats.items()]
+        result = [{'label': label, 'figure_key': figure_key, 'calls': calls,
+                   'total': total, 'mean': total / calls, 'max': max_}
+                  for (label, figure_key), (calls, total, max_) in items]
+        result.sort(key=lambda item: item[sort], reverse=True)
+        return result
+
+    def report(self, sort='total', limit=None):
+        """
+        Format the statistics as a table, slowest first.
+
+        Parameters
+        ----------
+        sort : {'total', 'mean', 'max', 'calls'}, optional
+            Default is 'total'.
+        limit : int, optional
+            Maximum number of rows. Default is None (all of them).
+        """
+        lines = [f"{'total (s)':>10} {'calls':>8} {'mean (ms)':>10} {'max (ms)':>10}  callback"]
+        for item in self.stats(sort)[:limit]:
+            label = item['label']
+            if item['figure_key'] is not None:
+                label += f" {item['figure_key']!r}"
+            lines.append(f"{item['total']:10.3f} {item['calls']:8d} "
+                         f"{item['mean'] * 1e3:10.3f} {item['max'] * 1e3:10.3f}  {label}")
+        return '\n'.join(lines)
+
+
+# The profiler used throughout bluesky_mpl
+profiler = CallbackProfiler()
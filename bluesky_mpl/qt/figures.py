@@ -1,42 +1,140 @@
+import concurrent.futures
+import functools
 import logging
+import time
 
 from event_model import RunRouter
 from matplotlib.backends.backend_qt5agg import (
     FigureCanvasQTAgg as FigureCanvas,
     NavigationToolbar2QT as NavigationToolbar)
 from matplotlib.figure import Figure
+from qtpy.QtCore import QEvent, QObject, QTimer
 from qtpy.QtWidgets import (  # noqa
     QLabel,
     QWidget,
     QVBoxLayout,
     )
-from traitlets.traitlets import Bool, List, Set
+from traitlets.traitlets import Bool, Float, Int, List, Set
 from traitlets.config import Configurable
 
+from ..artists.render import FigureRenderer
+from ..coalesce import EventCoalescer
+from .. import latency, profiling
 from ..heuristics.utils import hinted_fields, guess_dimensions  # noqa
+from ..heuristics.grid import GridPlotManager
 from ..heuristics.line import LinePlotManager
 from ..heuristics.image import LatestFrameImageManager
-from ..utils import load_config
+from ..utils import load_config, skip_start, wrap_factory
+from .offload import OffloadedCallback, UpdateTracker
 
 
 log = logging.getLogger('bluesky_mpl')
 
 
+class RenderScheduler:
+    """
+    Repaint dirty Figures at no more than a maximum rate.
+
+    Redraw requests from a :class:`FigureRenderer` are collected and rendered
+    together on the next tick of a timer, so any number of updates to the
+    same Figure between ticks costs one repaint.
+
+    Figures whose canvas is not visible, such as those in a background tab,
+    are not rendered. They stay dirty until their canvas is shown, and are
+    then rendered once with their latest state.
+
+    Parameters
+    ----------
+    max_fps : float
+        Maximum number of repaints per second. If zero or negative, requests
+        are rendered on the next pass through the Qt event loop, uncapped.
+    """
+    def __init__(self, max_fps):
+        self.max_fps = max_fps
+        self._dirty = {}  # Used as an ordered set of FigureRenderers.
+        self._hidden = {}  # Dirty, but waiting for their canvas to be shown.
+        self._last_tick = 0
+        self._timer = QTimer()
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self._tick)
+
+    def schedule(self, renderer):
+        "Mark a renderer as dirty, to be rendered on the next tick."
+        self._dirty[renderer] = None
+        if self._timer.isActive():
+            return
+        delay = 0
+        if self.max_fps > 0:
+            delay = max(0, self._last_tick + 1 / self.max_fps - time.monotonic())
+        self._timer.start(int(delay * 1000))
+
+    def watch(self, renderer):
+        """
+        Catch up on deferred rendering when this renderer's canvas is shown.
+        """
+        canvas = renderer.figure.canvas
+
+        def on_show():
+            if self._hidden.pop(renderer, False) is None:
+                self.schedule(renderer)
+
+        # Parent the filter to the canvas to tie their lifecycles together.
+        canvas.installEventFilter(_ShowEventFilter(on_show, canvas))
+
+    def _tick(self):
+        self._last_tick = time.monotonic()
+        dirty, self._dirty = self._dirty, {}
+        for renderer in dirty:
+            if renderer.figure.canvas.isVisible():
+                renderer.render()
+            else:
+                self._hidden[renderer] = None
+
+
+class _ShowEventFilter(QObject):
+    "Call a function whenever the watched widget is shown."
+    def __init__(self, callback, parent):
+        super().__init__(parent)
+        self._callback = callback
+
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.Show:
+            self._callback()
+        return False
+
+
 class FigureDispatcher(Configurable):
     """
     For a given Viewer, encasulate the matplotlib Figures and associated tabs.
     """
     factories = List([
         LinePlotManager,
+        GridPlotManager,
         LatestFrameImageManager],
         config=True)
     enabled = Bool(True, config=True)
+    max_fps = Float(20, config=True)
+    # Combine consecutive Events into EventPages of up to this many Events,
+    # holding each back for at most coalesce_interval seconds. Set
+    # coalesce_max_events to 1 to pass Events through one at a time.
+    coalesce_max_events = Int(1000, config=True)
+    coalesce_interval = Float(0.05, config=True)
+    # Extract and reduce the data for each EventPage on a pool of worker
+    # threads, and only update the plots on the GUI thread.
+    offload_compute = Bool(False, config=True)
+    compute_workers = Int(4, config=True)
     exclude_streams = Set([], config=True)
+    # Record the time spent in each factory and callback in
+    # bluesky_mpl.profiling.profiler.
+    profile = Bool(False, config=True)
 
     def __init__(self, add_tab):
         self.update_config(load_config())
         self.add_tab = add_tab
         self._figures = {}
+        # Shared by all the Figures, so repaints are paced globally.
+        self._scheduler = RenderScheduler(self.max_fps)
+        self._executor = None
 
     def get_figure(self, key, label, *args, **kwargs):
         try:
@@ -50,6 +148,9 @@ class FigureDispatcher(Configurable):
         fig.subplots()
         canvas = FigureCanvas(fig)
         canvas.setMinimumWidth(640)
+        renderer = FigureRenderer.for_figure(fig)
+        renderer.scheduler = self._scheduler
+        self._scheduler.watch(renderer)
         toolbar = NavigationToolbar(canvas, tab)
         tab_label = QLabel(label)
         tab_label.setMaximumHeight(20)
@@ -67,7 +168,65 @@ class FigureDispatcher(Configurable):
         if not self.enabled:
             return [], []
         dimensions = start_doc.get('hints', {}).get('dimensions', guess_dimensions(start_doc))
-        rr = RunRouter(
-            [factory(self, dimensions) for factory in self.factories])
+        factories = [factory(self, dimensions) for factory in self.factories]
+        if self.offload_compute:
+            if self._executor is None:
+                self._executor = concurrent.futures.ThreadPoolExecutor(
+                    self.compute_workers, thread_name_prefix='bluesky_mpl-compute')
+            tracker = UpdateTracker()
+            wrap = functools.partial(OffloadedCallback, executor=self._executor,
+                                     tracker=tracker)
+            factories = [wrap_factory(factory, wrap) for factory in factories]
+        if self.profile:
+            factories = [profiling.profiler.wrap_factory(factory, figure_key=self._figure_key)
+                         for factory in factories]
+        rr = RunRouter(factories)
         rr('start', start_doc)
-        return [rr], []
+        offloaded = self.offload_compute
+
+        def update(name, doc):
+            if not offloaded:
+                with latency.monitor.updating(name, doc):
+                    rr(name, doc)
+                return
+            # The artists are updated later, and the tracker records the
+            # 'update' stage once they all have.
+            with latency.monitor.updating(name, doc, record=False), \
+                    tracker.dispatching(name, doc):
+                rr(name, doc)
+
+        router = update
+        if self.coalesce_max_events > 1:
+            router = EventCoalescer(
+                update,
+                max_events=self.coalesce_max_events,
+                interval=self.coalesce_interval,
+                call_later=_call_later)
+
+        def callback(name, doc):
+            latency.monitor.record_document('dispatch', name, doc)
+            router(name, doc)
+
+        callback = skip_start(callback)
+        if self.profile:
+            callback = profiling.profiler.wrap(callback, label=type(self).__name__)
+        return [callback], []
+
+    def close(self):
+        "Shut down the pool of compute workers, if there is one."
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    def _figure_key(self, callback):
+        "The key of the Figure that an artist draws in, or None"
+        ax = getattr(callback, 'ax', None)
+        for key, fig in self._figures.items():
+            if ax is not None and ax.figure is fig:
+                return key
+        return None
+
+
+def _call_later(delay, func):
+    "Call func on this thread's Qt event loop after delay seconds."
+    QTimer.singleShot(int(delay * 1000), func)
@@ -0,0 +1,178 @@
+import collections
+import contextlib
+import logging
+import threading
+
+import event_model
+from qtpy.QtCore import QObject, Signal
+
+from .. import latency
+
+
+log = logging.getLogger('bluesky_mpl')
+
+
+class UpdateTracker:
+    """
+    Record the 'update' latency of each document once, after all the
+    OffloadedCallbacks it was routed to have applied it.
+
+    Each OffloadedCallback that receives a document counts it with
+    :meth:`add`, and marks it :meth:`done` once applied. The dispatcher wraps
+    the routing of each document in :meth:`dispatching`, so it is not
+    recorded before every artist has received it.
+    """
+    def __init__(self):
+        self._pending = {}  # maps document key to [count, Event times]
+
+    @contextlib.contextmanager
+    def dispatching(self, name, doc):
+        key = self.add(name, doc)
+        try:
+            yield
+        finally:
+            self.done(key)
+
+    def add(self, name, doc):
+        "Count one more recipient of a document. Return its key, or None."
+        if not latency.monitor.enabled:
+            return None
+        times = latency.event_times(name, doc)
+        if times is None:
+            return None
+        key = latency.document_key(doc)
+        self._pending.setdefault(key, [0, times])[0] += 1
+        return key
+
+    def done(self, key):
+        "Mark a document as applied by one recipient."
+        entry = self._pending.get(key)
+        if entry is None:
+            return
+        entry[0] -= 1
+        if entry[0] <= 0:
+            del self._pending[key]
+            latency.monitor.record('update', entry[1])
+
+
+class OffloadedCallback(QObject):
+    """
+    Run the "compute" phase of an artist's event_page on a thread pool.
+
+    The artist must have ``compute_event_page(doc)``, which extracts the data
+    to plot without touching matplotlib, and ``apply_event_page(result)``,
+    which updates the plot. The former runs on the executor; the latter, and
+    all the other documents, are applied on the thread that owns this object
+    (the GUI thread) in the order the documents arrived. Artists without a
+    compute phase are called directly.
+
+    At most one page per artist is computed ahead of the GUI thread. Pages
+    that arrive meanwhile are merged into one, which is computed once the
+    previous result has been applied. So a fast stream costs one compute per
+    repaint of this artist, and the backlog never holds more than one
+    computed result.
+
+    The 'update' latency of each page is recorded through ``tracker``, once
+    all the artists sharing it have applied the page.
+
+    Parameters
+    ----------
+    artist : callable
+        Expected signature ``f(name, doc)``
+    executor : concurrent.futures.Executor
+    tracker : UpdateTracker, optional
+        Shared by the OffloadedCallbacks that documents are routed to
+        together. If None, this one has its own.
+    """
+    _computed = Signal()
+
+    def __init__(self, artist, executor, tracker=None):
+        super().__init__()
+        self.artist = artist
+        self.__wrapped__ = artist
+        self.executor = executor
+        self.tracker = UpdateTracker() if tracker is None else tracker
+        # (name, doc, Future or None, tracker keys) in order. An
+        # 'event_page' with no Future is waiting to be submitted.
+        self._pending = collections.deque()
+        self._in_flight = None  # The Future of the page being computed
+        # Serialize the compute phase for this artist, which may keep state
+        # (such as reusable buffers) between pages. Different artists still
+        # compute in parallel.
+        self._compute_lock = threading.Lock()
+        # Emitted from worker threads, so this is a queued connection.
+        self._computed.connect(self._on_computed)
+
+    def __repr__(self):
+        return f"<{type(self).__name__} {self.artist!r}>"
+
+    def __call__(self, name, doc):
+        if not hasattr(self.artist, 'compute_event_page'):
+            self.artist(name, doc)
+            return
+        if name == 'event':
+            name, doc = 'event_page', event_model.pack_event_page(doc)
+        if name == 'event_page':
+            self._add_page(doc)
+        else:
+            self._pending.append((name, doc, None, ()))
+        self._apply_ready()
+
+    def _add_page(self, doc):
+        keys = (self.tracker.add('event_page', doc),)
+        if self._pending:
+            last_name, last_doc, future, last_keys = self._pending[-1]
+            if (last_name == 'event_page' and future is None
+                    and last_doc['descriptor'] == doc['descriptor']):
+                # Not submitted yet, so merge into it.
+                merged = event_model.merge_event_pages([last_doc, doc])
+                self._pending[-1] = ('event_page', merged, None, last_keys + keys)
+                return
+        self._pending.append(('event_page', doc, None, keys))
+
+    def _submit_next(self):
+        "Submit the first waiting page, unless one is being computed."
+        if self._in_flight is not None:
+            return
+        for i, (name, doc, future, keys) in enumerate(self._pending):
+            if name == 'event_page' and future is None:
+                future = self.executor.submit(self._compute, doc)
+                self._pending[i] = (name, doc, future, keys)
+                self._in_flight = future
+                future.add_done_callback(lambda future: self._computed.emit())
+                return
+
+    def _compute(self, doc):
+        with self._compute_lock:
+            return self.artist.compute_event_page(doc)
+
+    def _apply_ready(self):
+        "Apply everything at the head of the line that is ready, in order."
+        try:
+            while self._pending:
+                name, doc, future, keys = self._pending[0]
+                if name == 'event_page':
+                    if future is None or not future.done():
+                        break
+                    self._pending.popleft()
+                    self._in_flight = None
+                    try:
+                        # Only attribute redraws to the page here; the
+                        # tracker records 'update' once per document.
+                        with latency.monitor.updating(name, doc, record=False):
+                            self.artist.apply_event_page(future.result())
+                    finally:
+                        for key in keys:
+                            self.tracker.done(key)
+                else:
+                    self._pending.popleft()
+                    self.artist(name, doc)
+        finally:
+            self._submit_next()
+
+    def _on_computed(self):
+        try:
+            self._apply_ready()
+        except Exception:
+            # An exception escaping a Qt slot would abort the application.
+            log.exception("Error updating %r", self.artist)
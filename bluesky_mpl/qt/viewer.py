@@ -6,15 +6,18 @@ import re
 import event_model
 import matplotlib
 from traitlets.traitlets import Dict, DottedObjectName, List
-from qtpy.QtWidgets import QApplication, QMainWindow, QTabWidget
-from qtpy.QtCore import QObject, Signal
+from traitlets.utils.importstring import import_item
+from qtpy.QtWidgets import QApplication, QLabel, QMainWindow, QTabWidget
+from qtpy.QtCore import QObject, QTimer, Signal
 from qtpy import QtCore, QtGui
 
 from .figures import FigureDispatcher
 from .utils import (
     ConfigurableQObject,
 )
-from ..utils import load_config
+from .. import coalesce, latency
+from ..handlers import HANDLERS
+from ..utils import load_config, load_runs, skip_start
 
 
 @functools.lru_cache(maxsize=1)
@@ -93,13 +96,17 @@ def _create_qApp():
         pass
 
 
-def start_viewers():
+def start_viewers(show_latency=False):
     matplotlib.use('Qt5Agg')
     _create_qApp()
     main_window = QMainWindow()
     viewers = Viewers()
     main_window.setCentralWidget(viewers)
+    if show_latency:
+        viewers.show_latency()
     main_window.show()
+    # Closing the main window does not close the widgets in it.
+    QApplication.instance().aboutToQuit.connect(viewers.close)
     # Avoid letting main_window be garbage collected.
     viewers._main_window = main_window
     return viewers
@@ -107,12 +114,15 @@ def start_viewers():
 
 class Viewers(QTabWidget):
     name_doc = Signal(str, dict)
+    # Emitted from worker threads with all of a Run's documents; see add_runs.
+    run_loaded = Signal([list])
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.run_router = QRunRouter([self.current_viewer])
         self._viewers = {}
         self.name_doc.connect(self.run_router)
+        self.run_loaded.connect(self.add_documents)
 
     def __repr__(self):
         return f"<Viewer({set(self._viewers)})>"
@@ -139,10 +149,101 @@ class Viewers(QTabWidget):
     def __call__(self, name, doc):
         self.name_doc.emit(name, doc)
 
-    def add_run(self, run, fill='delayed'):
-        for name, doc in run.canonical(fill=fill):
+    def add_documents(self, batch):
+        """
+        Dispatch a batch of documents in one go.
+
+        This must be called from the GUI thread. It is intended to be connected
+        to the ``document_batch`` signal of a ConsumerThread.
+
+        Parameters
+        ----------
+        batch : list
+            A list of (name, doc) pairs
+        """
+        for name, doc in batch:
+            self.run_router(name, doc)
+
+    def add_run(self, run, fill='delayed', fast_forward=True):
+        """
+        Show a Run from a catalog.
+
+        Parameters
+        ----------
+        run : BlueskyRun
+        fill : {'delayed', 'yes', 'no'}, optional
+            Passed to ``run.canonical``. Default is 'delayed'.
+        fast_forward : bool, optional
+            If the Run is complete, combine all of each stream's Events into
+            one EventPage, so that the plots are drawn once for the whole Run.
+            See :func:`bluesky_mpl.coalesce.fast_forward`. Default is True.
+        """
+        documents = run.canonical(fill=fill)
+        if fast_forward:
+            documents = coalesce.fast_forward(documents)
+        for name, doc in documents:
             self.name_doc.emit(name, doc)
 
+    def add_runs(self, runs, fill='delayed', fast_forward=True, max_workers=4):
+        """
+        Show many Runs from a catalog, reading them concurrently.
+
+        The Runs' documents are read on a pool of worker threads, so this
+        returns immediately and the window stays responsive. As each Run
+        finishes loading, all of its documents are dispatched together on the
+        GUI thread. Runs are shown in the order they finish loading.
+
+        Parameters
+        ----------
+        runs : iterable or catalog
+            BlueskyRuns, or a catalog such as a search result
+        fill : {'delayed', 'yes', 'no'}, optional
+            Passed to ``run.canonical``. Default is 'delayed'.
+        fast_forward : bool, optional
+            See :meth:`add_run`. Default is True.
+        max_workers : int, optional
+            Number of Runs to read at once. Default is 4.
+
+        Returns
+        -------
+        futures : list
+            A ``concurrent.futures.Future`` for each Run. See
+            :func:`bluesky_mpl.utils.load_runs`.
+        """
+        return load_runs(runs, self.run_loaded.emit, fill=fill,
+                         fast_forward=fast_forward, max_workers=max_workers)
+
+    def closeEvent(self, event):
+        for viewer in self._viewers.values():
+            viewer.close()
+        super().closeEvent(event)
+
+    def show_latency(self, interval=1):
+        """
+        Turn on latency monitoring and show a summary of it, kept up to date.
+
+        The summary goes in the status bar of the main window, if this is in
+        a QMainWindow, or else next to the tabs. See
+        :mod:`bluesky_mpl.latency` for the full results.
+
+        Parameters
+        ----------
+        interval : float, optional
+            Seconds between updates of the summary. Default is 1.
+        """
+        latency.monitor.enabled = True
+        window = self.window()
+        if isinstance(window, QMainWindow):
+            show = window.statusBar().showMessage
+        else:
+            label = QLabel()
+            self.setCornerWidget(label)
+            show = label.setText
+        self._latency_timer = QTimer(self)
+        self._latency_timer.timeout.connect(
+            lambda: show(latency.monitor.format_summary()))
+        self._latency_timer.start(int(interval * 1000))
+
     def add_viewer(self, label=None):
         if label in self._viewers:
             raise ValueError(f"Must be unique and {label} is already taken")
@@ -181,41 +282,112 @@ class Viewers(QTabWidget):
         else:
             tab = self.add_viewer()
         tab.run_router('start', doc)
-        return [tab.run_router], []
+        return [skip_start(tab.run_router)], []
 
 
 class Viewer(ConfigurableQObject):
     name_doc = Signal(str, dict)
+    # Emitted from worker threads with all of a Run's documents; see add_runs.
+    run_loaded = Signal([list])
     factories = List([FigureDispatcher], config=True)
-    handler_registry = Dict(DottedObjectName(), config=True)
+    # Maps spec to the dotted name of a handler class. The defaults read
+    # image data lazily, so that only the frames displayed are read.
+    handler_registry = Dict(DottedObjectName(), default_value=HANDLERS, config=True)
 
     def __init__(self, inner_tab_container, set_label, *args, **kwargs):
         self.update_config(load_config())
         self._inner_tab_container = inner_tab_container
         self._set_label = set_label
         self._run_start_uids = []
-        factories = [factory(self._inner_tab_container.addTab)
-                     for factory in self.factories]
-        factories.append(self._register_run)
+        self._factories = [factory(self._inner_tab_container.addTab)
+                           for factory in self.factories]
+        factories = [*self._factories, self._register_run]
+        handler_registry = {
+            spec: import_item(name) for spec, name in self.handler_registry.items()}
         self.run_router = QRunRouter(
             factories,
-            handler_registry=self.handler_registry)
+            handler_registry=handler_registry)
         super().__init__(*args, **kwargs)
         self.name_doc.connect(self.run_router)
+        self.run_loaded.connect(self.add_documents)
+        # Do not refer to self here, which would keep it alive.
+        closers = [factory.close for factory in self._factories if hasattr(factory, 'close')]
+        inner_tab_container.destroyed.connect(lambda: _close_all(closers))
 
     def rename(self, label):
         self._set_label(label)
 
+    def close(self):
+        "Release the resources, such as worker threads, held by the factories."
+        _close_all(factory.close for factory in self._factories if hasattr(factory, 'close'))
+
     def __repr__(self):
         return f"<{type(self).__name__}>"
 
-    def add_run(self, run, fill='delayed'):
-        for name, doc in run.canonical(fill=fill):
+    def add_run(self, run, fill='delayed', fast_forward=True):
+        """
+        Show a Run from a catalog.
+
+        Parameters
+        ----------
+        run : BlueskyRun
+        fill : {'delayed', 'yes', 'no'}, optional
+            Passed to ``run.canonical``. Default is 'delayed'.
+        fast_forward : bool, optional
+            If the Run is complete, combine all of each stream's Events into
+            one EventPage, so that the plots are drawn once for the whole Run.
+            See :func:`bluesky_mpl.coalesce.fast_forward`. Default is True.
+        """
+        documents = run.canonical(fill=fill)
+        if fast_forward:
+            documents = coalesce.fast_forward(documents)
+        for name, doc in documents:
             self.name_doc.emit(name, doc)
 
+    def add_runs(self, runs, fill='delayed', fast_forward=True, max_workers=4):
+        """
+        Show many Runs from a catalog, reading them concurrently.
+
+        The Runs' documents are read on a pool of worker threads, so this
+        returns immediately and the window stays responsive. As each Run
+        finishes loading, all of its documents are dispatched together on the
+        GUI thread. Runs are shown in the order they finish loading.
+
+        Parameters
+        ----------
+        runs : iterable or catalog
+            BlueskyRuns, or a catalog such as a search result
+        fill : {'delayed', 'yes', 'no'}, optional
+            Passed to ``run.canonical``. Default is 'delayed'.
+        fast_forward : bool, optional
+            See :meth:`add_run`. Default is True.
+        max_workers : int, optional
+            Number of Runs to read at once. Default is 4.
+
+        Returns
+        -------
+        futures : list
+            A ``concurrent.futures.Future`` for each Run. See
+            :func:`bluesky_mpl.utils.load_runs`.
+        """
+        return load_runs(runs, self.run_loaded.emit, fill=fill,
+                         fast_forward=fast_forward, max_workers=max_workers)
+
     def __call__(self, name, doc):
         self.name_doc.emit(name, doc)
 
+    def add_documents(self, batch):
+        """
+        Dispatch a batch of documents in one go, on the GUI thread.
+
+        Parameters
+        ----------
+        batch : list
+            A list of (name, doc) pairs
+        """
+        for name, doc in batch:
+            self.run_router(name, doc)
+
     def _register_run(self, name, doc):
         "Capture the uid of every Run added to this Viewer."
         assert name == 'start'
@@ -223,5 +395,10 @@ class Viewer(ConfigurableQObject):
         return [], []
 
 
+def _close_all(closers):
+    for close in closers:
+        close()
+
+
 class InnerTabContainer(QTabWidget):
     ...
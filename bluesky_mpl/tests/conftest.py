@@ -0,0 +1,36 @@
+import os
+import time
+
+import matplotlib
+import pytest
+
+# The tests do not need a display.
+matplotlib.use('Agg')
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+
+@pytest.fixture(scope='session')
+def qapp():
+    "A QApplication, on the offscreen platform"
+    QtWidgets = pytest.importorskip('qtpy.QtWidgets')
+    return QtWidgets.QApplication.instance() or QtWidgets.QApplication(['bluesky_mpl-tests'])
+
+
+@pytest.fixture
+def process_events(qapp):
+    """
+    A function that runs the Qt event loop until a condition is met.
+
+    Its signature is ``f(condition=None, timeout=5)``. If condition is None,
+    it runs for the whole timeout. It returns whether the condition was met.
+    """
+    def process_events(condition=None, timeout=5):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            qapp.processEvents()
+            if condition is not None and condition():
+                return True
+            time.sleep(0.001)
+        return condition is None
+
+    return process_events
@@ -0,0 +1,304 @@
+import gc
+import weakref
+
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+import numpy
+import pytest
+
+from ..artists.clim import make_clim_estimator, strided_sample
+from ..artists.grid import Grid
+from ..artists.image import Image
+from ..artists.irregular_grid import IrregularGrid
+from ..artists.line import Line
+from ..artists.render import FigureRenderer
+from ..artists.utils import GrowableArray, image_pyramid, lttb_indices, minmax_indices
+
+
+def test_growable_array():
+    arr = GrowableArray(capacity=2)
+    arr.extend([1, 2, 3])
+    arr.extend(numpy.arange(4, 10))
+    assert len(arr) == 9
+    assert arr.capacity >= 9
+    numpy.testing.assert_array_equal(arr.data, numpy.arange(1, 10))
+    # The filled region is exposed as a view on the storage.
+    assert arr.data.base is not None
+
+
+def test_line_accumulates_pages():
+    line = Line(lambda page: (page['data']['x'], page['data']['y']))
+    line('event_page', {'data': {'x': [1, 2], 'y': [3, 4]}})
+    line('event_page', {'data': {'x': numpy.array([3.]), 'y': numpy.array([5.])}})
+    line('event_page', {'data': {'x': [], 'y': []}})
+    numpy.testing.assert_array_equal(line.x_data, [1, 2, 3])
+    numpy.testing.assert_array_equal(line.y_data, [3, 4, 5])
+
+
+def test_minmax_indices_preserve_extrema():
+    y = numpy.sin(numpy.linspace(0, 20, 10000))
+    y[1234] = 5
+    y[5678] = -5
+    indices = minmax_indices(y, 100)
+    assert len(indices) <= 202
+    assert {0, 1234, 5678, 9999} <= set(indices)
+
+
+def test_lttb_indices():
+    x = numpy.arange(10000.)
+    y = numpy.sin(x / 100)
+    indices = lttb_indices(x, y, 500)
+    assert len(indices) == 500
+    assert indices[0] == 0 and indices[-1] == 9999
+    assert numpy.all(numpy.diff(indices) > 0)
+
+
+def test_decimated_line_keeps_full_data():
+    line = Line(lambda page: (page['data']['x'], page['data']['y']), decimate='minmax')
+    x = numpy.arange(100000.)
+    line('event_page', {'data': {'x': x, 'y': numpy.sin(x)}})
+    assert len(line.x_data) == 100000
+    drawn_x, drawn_y = line.line.get_data()
+    assert len(drawn_x) <= 2 * line.ax.bbox.width + 2
+    # Zooming in redraws at full resolution.
+    line.ax.set_xlim(10, 20)
+    drawn_x, drawn_y = line.line.get_data()
+    numpy.testing.assert_array_equal(drawn_x, numpy.arange(9., 22.))
+
+
+def test_line_limits_track_data_incrementally():
+    func = lambda page: (page['data']['x'], page['data']['y'])  # noqa: E731
+    a = Line(func)
+    b = Line(func, ax=a.ax, decimate='lttb')
+    a('event_page', {'data': {'x': [0, 1], 'y': [0, 1]}})
+    b('event_page', {'data': {'x': [0, 1, 2], 'y': [0, numpy.nan, 10]}})
+    numpy.testing.assert_array_equal(a.ax.dataLim.intervaly, (0, 10))
+    # Hiding or removing a Line shrinks the limits to what remains.
+    b.line.set_visible(False)
+    numpy.testing.assert_array_equal(a.ax.dataLim.intervaly, (0, 1))
+    b.line.set_visible(True)
+    numpy.testing.assert_array_equal(a.ax.dataLim.intervalx, (0, 2))
+    b.remove()
+    numpy.testing.assert_array_equal(a.ax.dataLim.intervalx, (0, 1))
+
+
+def test_blitting_line_redraws_figure_only_when_limits_change():
+    line = Line(lambda page: (page['data']['x'], page['data']['y']), blit=True)
+    canvas = line.ax.figure.canvas
+    draws = []
+    canvas.mpl_connect('draw_event', draws.append)
+    line.ax.set_xlim(0, 10)
+    line.ax.set_ylim(0, 10)
+    canvas.draw()
+    assert len(draws) == 1
+    line('event_page', {'data': {'x': [1, 2], 'y': [1, 2]}})
+    line('event_page', {'data': {'x': [3], 'y': [3]}})
+    assert len(draws) == 1
+    line.ax.set_autoscale_on(True)
+    line('event_page', {'data': {'x': [30], 'y': [30]}})
+    assert len(draws) == 2
+
+
+def test_image_pyramid():
+    arr = numpy.arange(9 * 10).reshape(9, 10)
+    levels = image_pyramid(arr, min_size=3)
+    assert levels[0] is arr
+    assert [level.shape for level in levels] == [(9, 10), (4, 5), (2, 2)]
+    assert levels[1][0, 0] == numpy.mean([0, 1, 10, 11])
+
+
+def test_image_level_of_detail():
+    frame = numpy.random.random((2048, 2048))
+    image = Image(lambda page: page['data']['img'][-1], (2048, 2048), lod=True)
+    ax = image.ax
+    image('event_page', {'data': {'img': [frame]}})
+    assert image.frame is frame
+    # The whole frame is in view, in much less than 2048 screen pixels.
+    assert image.level >= 2
+    shown = image.image.get_array()
+    assert max(shown.shape) <= 2048 // 2 ** image.level
+    extent = image.image.get_extent()
+    numpy.testing.assert_allclose(extent, (-0.5, 2047.5, 2047.5, -0.5))
+    # Zooming in on a small region switches to full resolution, cropped.
+    ax.set_xlim(100, 200)
+    ax.set_ylim(300, 250)
+    assert image.level == 0
+    assert image.image.get_array().shape == (51, 101)
+    numpy.testing.assert_array_equal(image.image.get_array(), frame[250:301, 100:201])
+    assert ax.get_xlim() == (100, 200)
+
+
+def test_image_level_of_detail_follows_frame_shape():
+    func = lambda page: page['data']['img'][-1]  # noqa: E731
+    image = Image(func, (64, 64), lod=True, lod_min_size=8)
+    image('event_page', {'data': {'img': [numpy.zeros((64, 64))]}})
+    # A later run reuses the AxesImage, with a different frame shape.
+    image = Image(func, (128, 256), ax=image.ax, lod=True, lod_min_size=8)
+    frame = numpy.random.random((128, 256))
+    image('event_page', {'data': {'img': [frame]}})
+    assert image.ax.get_xlim() == (-0.5, 255.5)
+    assert image.ax.get_ylim() == (127.5, -0.5)
+    factor = 2 ** image.level
+    shown = image.image.get_array()
+    assert shown.shape == (128 // factor, 256 // factor)
+    numpy.testing.assert_allclose(image.image.get_extent(), (-0.5, 255.5, 127.5, -0.5))
+    # An explicit extent is kept.
+    image = Image(func, (64, 64), extent=(0, 1, 0, 1), lod=True, lod_min_size=8)
+    image('event_page', {'data': {'img': [frame]}})
+    numpy.testing.assert_allclose(image.image.get_extent(), (0, 1, 0, 1))
+
+
+def test_clim_strategies_ignore_hot_pixels_and_adapt():
+    rng = numpy.random.default_rng(0)
+    frames = [rng.normal(100, 1, (500, 500)) for _ in range(10)]
+    frames[0][0, 0] = 1e6  # hot pixel
+    frames += [rng.normal(1000, 1, (500, 500)) for _ in range(10)]
+    assert 500 < len(strided_sample(frames[0], 1000)) < 1100
+    assert len(strided_sample(numpy.array([1., numpy.nan]), 10)) == 1
+    for strategy in ('percentile', 'decaying_histogram', 'window'):
+        estimator = make_clim_estimator(strategy, max_samples=10000)
+        vmin, vmax = estimator.update(frames[0])
+        assert 90 < vmin < vmax < 110, strategy
+        for frame in frames[1:]:
+            vmin, vmax = estimator.update(frame)
+        # The limits have followed the change in signal level.
+        assert 990 < vmin < vmax < 1010, strategy
+    estimator = make_clim_estimator('expand')
+    for frame in frames:
+        clim = estimator.update(frame)
+    assert clim[1] == 1e6
+
+
+def test_image_clim_strategy_and_tolerance():
+    frame = numpy.random.default_rng(0).normal(100, 1, (64, 64))
+    image = Image(lambda page: page['data']['img'][-1], (64, 64),
+                  clim_strategy='percentile', clim_options={'low': 0, 'high': 100},
+                  clim_tolerance=0.5)
+    image('event_page', {'data': {'img': [frame]}})
+    clim = image.image.get_clim()
+    numpy.testing.assert_allclose(clim, (frame.min(), frame.max()))
+    # A small change is ignored; a big one is not.
+    image('event_page', {'data': {'img': [frame + 0.1]}})
+    assert image.image.get_clim() == clim
+    image('event_page', {'data': {'img': [frame * 2]}})
+    assert image.image.get_clim()[1] > 190
+
+
+def test_image_feeds_each_frame_to_the_clim_estimator_once():
+    class Estimator:
+        def __init__(self):
+            self.frames = []
+
+        def update(self, arr):
+            self.frames.append(arr)
+            # No estimate until the second frame
+            return (0, len(self.frames)) if len(self.frames) > 1 else None
+
+    estimator = Estimator()
+    image = Image(lambda page: page['data']['img'][-1], (4, 4), clim_strategy=estimator)
+    clim = image.image.get_clim()
+    for i in range(3):
+        image('event_page', {'data': {'img': [numpy.full((4, 4), i)]}})
+        if i == 0:
+            assert image.image.get_clim() == clim
+    assert [frame[0, 0] for frame in estimator.frames] == [0, 1, 2]
+    assert image.image.get_clim() == (0, 3)
+
+
+def test_from_expr():
+    line = Line.from_expr('seq_num', 'log(I/I0)')
+    line('event_page', {'seq_num': [1, 2], 'time': [0., 1.],
+                        'data': {'I': [1., 4.], 'I0': [1., 2.], 'unused': [0, 0]}})
+    numpy.testing.assert_array_equal(line.x_data, [1, 2])
+    numpy.testing.assert_allclose(line.y_data, [0, numpy.log(2)])
+    # Fields take precedence over numpy names.
+    line = Line.from_expr('time', 'e')
+    line('event_page', {'time': [0.], 'data': {'e': [3.]}})
+    numpy.testing.assert_array_equal(line.y_data, [3])
+
+
+def test_grid_accepts_arrays_and_accumulates():
+    func = lambda page: (page['data']['x'], page['data']['y'], page['data']['I'])  # noqa: E731
+    grid = Grid(func, (2, 3), dtype='float32', accumulate='mean')
+    assert grid.grid_data.dtype == numpy.float32
+    grid('event_page', {'data': {'x': numpy.array([0, 0, 1]),
+                                 'y': numpy.array([1, 1, 2]),
+                                 'I': numpy.array([1., 3., 5.])}})
+    grid('event_page', {'data': {'x': [1], 'y': [2], 'I': [7.]}})
+    grid('event_page', {'data': {'x': [], 'y': [], 'I': []}})
+    expected = [[numpy.nan, 2, numpy.nan], [numpy.nan, numpy.nan, 6]]
+    numpy.testing.assert_array_equal(grid.grid_data, expected)
+    # The mean of integers would be truncated in an integer grid.
+    with pytest.raises(ValueError):
+        Grid(func, (2, 3), dtype='int32', accumulate='mean')
+    grid = Grid(func, (2, 3), dtype='int32', accumulate='sum')
+    grid('event_page', {'data': {'x': [0, 0], 'y': [1, 1], 'I': [1, 2]}})
+    assert grid.grid_data[0, 1] == 3
+    # Whole numbers given as floats are fine, but others would be truncated.
+    grid('event_page', {'data': {'x': [0], 'y': [1], 'I': [2.]}})
+    assert grid.grid_data[0, 1] == 5
+    with pytest.raises(ValueError):
+        grid('event_page', {'data': {'x': [0], 'y': [1], 'I': [0.5]}})
+    assert grid.grid_data[0, 1] == 5
+
+
+def test_irregular_grid():
+    func = lambda page: (page['data']['x'], page['data']['y'], page['data']['I'])  # noqa: E731
+    grid = IrregularGrid(func, (4, 4), (0, 4, 0, 4), radius=1)
+    grid('event_page', {'data': {'x': [0.5, 3.4], 'y': [0.5, 3.6], 'I': [1., 2.]}})
+    assert grid.grid_data[0, 0] == 1
+    assert grid.grid_data[3, 3] == 2
+    assert grid.grid_data[0, 1] == 1  # one cell away
+    assert numpy.isnan(grid.grid_data[1, 2])  # out of reach of both
+    # A nearer point takes over the cell it lands in and nothing else.
+    grid('event_page', {'data': {'x': [1.6], 'y': [0.5], 'I': [3.]}})
+    assert grid.grid_data[0, 0] == 1
+    assert grid.grid_data[0, 1] == 3
+    before = grid.grid_data.copy()
+    grid.rasterize()
+    numpy.testing.assert_array_equal(grid.grid_data, before)
+    grid.method = 'idw'
+    grid.rasterize()
+    assert 1 < grid.grid_data[0, 1] < 3
+
+
+def test_irregular_grid_method_dtype_and_extent():
+    func = lambda page: (page['data']['x'], page['data']['y'], page['data']['I'])  # noqa: E731
+    page = {'data': {'x': [0.5, 1.6], 'y': [0.5, 0.5], 'I': [1., 3.]}}
+    grid = IrregularGrid(func, (4, 4), (0, 4, 0, 4), radius=1)
+    # Switching method, without calling rasterize, keeps working.
+    grid.method = 'idw'
+    grid('event_page', page)
+    assert 1 < grid.grid_data[0, 1] < 3
+    grid.method = 'nearest'
+    assert grid.grid_data[0, 1] == 3
+    grid('event_page', page)
+    with pytest.raises(ValueError):
+        grid.method = 'cubic'
+    with pytest.raises(ValueError):
+        IrregularGrid(func, (4, 4), (0, 4, 0, 4), dtype=int)
+    # A line of points, all at one y, has a zero-height extent.
+    grid = IrregularGrid(func, (1, 4), (0, 4, 0.5, 0.5))
+    assert grid.extent == (0, 4, 0, 1)
+    grid('event_page', page)
+    assert grid.grid_data[0, 0] == 1
+    with pytest.raises(ValueError):
+        IrregularGrid(func, (4, 4), (0, numpy.nan, 0, 4))
+
+
+def test_figures_are_freed_with_their_artists():
+    fig = Figure()
+    FigureCanvasAgg(fig)
+    line_ax, image_ax = fig.subplots(2)
+    line = Line(lambda page: (page['data']['x'], page['data']['y']), ax=line_ax, blit=True)
+    line('event_page', {'data': {'x': [1, 2], 'y': [3, 4]}})
+    image = Image(lambda page: page['data']['img'][-1], (8, 8), ax=image_ax, lod=True)
+    image('event_page', {'data': {'img': [numpy.ones((8, 8))]}})
+    assert FigureRenderer.for_figure(fig) is line._renderer is image._renderer
+    fig.canvas.draw()
+    figure_ref = weakref.ref(fig)
+    renderer_ref = weakref.ref(line._renderer)
+    del fig, line_ax, image_ax, line, image
+    gc.collect()
+    assert figure_ref() is None
+    assert renderer_ref() is None
@@ -0,0 +1,14 @@
+import pytest
+
+from ..benchmarks import KINDS, generate_documents, run_benchmark
+
+
+@pytest.mark.parametrize('kind', KINDS)
+@pytest.mark.parametrize('page_size', [1, 7])
+def test_benchmark_smoke(kind, page_size):
+    documents = generate_documents(kind, num_events=20, page_size=page_size,
+                                   num_fields=2, image_shape=(8, 8), grid_shape=(4, 5))
+    result = run_benchmark(documents)
+    assert result['events'] == (20 if kind != 'grid' else 4 * 5)
+    assert result['redraws'] > 0
+    assert result['latency_p50'] <= result['latency_max']
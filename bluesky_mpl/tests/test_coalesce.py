@@ -0,0 +1,75 @@
+import event_model
+
+from ..coalesce import EventCoalescer, fast_forward
+
+
+def test_event_coalescer():
+    run = event_model.compose_run()
+    data_keys = {'x': {'source': '', 'dtype': 'number', 'shape': []}}
+    a = run.compose_descriptor(name='a', data_keys=data_keys)
+    b = run.compose_descriptor(name='b', data_keys=data_keys)
+    received = []
+    pending = []
+    coalescer = EventCoalescer(lambda name, doc: received.append((name, doc)),
+                               max_events=3, call_later=lambda delay, func: pending.append(func))
+
+    def event(desc, x):
+        return desc.compose_event(data={'x': x}, timestamps={'x': 0})
+
+    coalescer('start', run.start_doc)
+    for x in range(4):
+        coalescer('event', event(a, x))
+    coalescer('event', event(b, 4))
+    coalescer('event', event(a, 5))
+    coalescer('stop', run.compose_stop())
+    assert [(name, doc.get('data', {}).get('x')) for name, doc in received] == [
+        ('start', None),
+        ('event_page', [0, 1, 2]),
+        ('event_page', [3]),
+        ('event_page', [4]),
+        ('event_page', [5]),
+        ('stop', None)]
+
+    # An Event is released by the timer if nothing else comes along...
+    received.clear()
+    pending.clear()
+    coalescer('event', event(a, 6))
+    pending.pop()()
+    assert received[-1][1]['data']['x'] == [6]
+    # ...but a stale timer does nothing.
+    coalescer('event', event(a, 7))
+    coalescer.flush()
+    coalescer('event', event(a, 8))
+    pending[0]()
+    assert received[-1][1]['data']['x'] == [7]
+
+
+def test_fast_forward():
+    run = event_model.compose_run()
+    data_keys = {'x': {'source': '', 'dtype': 'number', 'shape': []}}
+    a = run.compose_descriptor(name='a', data_keys=data_keys)
+    b = run.compose_descriptor(name='b', data_keys=data_keys)
+
+    def event(desc, x):
+        return desc.compose_event(data={'x': x}, timestamps={'x': 0})
+
+    documents = [('start', run.start_doc), ('descriptor', a.descriptor_doc)]
+    documents.extend(('event', event(a, x)) for x in range(3))
+    documents.append(('descriptor', b.descriptor_doc))
+    documents.append(('event', event(b, 3)))
+    documents.append(('event_page', event_model.pack_event_page(event(a, 4), event(a, 5))))
+    documents.append(('event', event(a, 6)))
+
+    # An incomplete run is passed through as it is.
+    assert list(fast_forward(documents)) == documents
+
+    documents.append(('stop', run.compose_stop()))
+    replayed = list(fast_forward(documents))
+    assert [(name, doc.get('data', {}).get('x')) for name, doc in replayed] == [
+        ('start', None),
+        ('descriptor', None),
+        ('descriptor', None),
+        ('event_page', [0, 1, 2, 4, 5, 6]),
+        ('event_page', [3]),
+        ('stop', None)]
+    assert replayed[3][1]['seq_num'] == [1, 2, 3, 4, 5, 6]
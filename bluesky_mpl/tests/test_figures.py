@@ -0,0 +1,71 @@
+from types import SimpleNamespace
+import time
+
+import pytest
+
+pytest.importorskip('qtpy.QtWidgets')
+from ..qt.figures import RenderScheduler  # noqa: E402
+
+
+class Renderer:
+    "A stand-in for FigureRenderer that records when it renders, and what."
+    def __init__(self, canvas):
+        self.figure = SimpleNamespace(canvas=canvas)
+        self.state = None
+        self.renders = []  # (time, state)
+
+    def render(self):
+        self.renders.append((time.monotonic(), self.state))
+
+
+def test_render_scheduler_coalesces_and_caps_rate(process_events):
+    max_fps = 20
+    scheduler = RenderScheduler(max_fps)
+    renderer = Renderer(SimpleNamespace(isVisible=lambda: True))
+    for _ in range(100):
+        scheduler.schedule(renderer)
+    assert process_events(lambda: renderer.renders)
+    process_events(timeout=0.2)
+    assert len(renderer.renders) == 1
+    # Keep requesting as fast as possible.
+    for i in range(5):
+        count = len(renderer.renders)
+        scheduler.schedule(renderer)
+        assert process_events(lambda: len(renderer.renders) > count)
+    ticks = [t for t, _ in renderer.renders]
+    # Allow for timers firing slightly early.
+    assert min(b - a for a, b in zip(ticks, ticks[1:])) > 0.9 / max_fps
+
+
+def test_render_scheduler_defers_hidden_figures(process_events):
+    from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg
+    from matplotlib.figure import Figure
+    from qtpy.QtWidgets import QTabWidget, QWidget
+
+    tabs = QTabWidget()
+    tabs.addTab(QWidget(), 'front')
+    canvas = FigureCanvasQTAgg(Figure())
+    tabs.addTab(canvas, 'back')
+    tabs.show()
+    assert process_events(tabs.isVisible)
+    assert not canvas.isVisible()
+
+    scheduler = RenderScheduler(max_fps=0)
+    renderer = Renderer(canvas)
+    scheduler.watch(renderer)
+    for state in range(3):
+        renderer.state = state
+        scheduler.schedule(renderer)
+        process_events(timeout=0.05)
+    assert renderer.renders == []
+
+    tabs.setCurrentIndex(1)
+    assert process_events(lambda: renderer.renders)
+    process_events(timeout=0.1)
+    assert [state for _, state in renderer.renders] == [2]
+    # Hiding and showing it again, with nothing new, does not render.
+    tabs.setCurrentIndex(0)
+    tabs.setCurrentIndex(1)
+    process_events(timeout=0.1)
+    assert len(renderer.renders) == 1
+    tabs.close()
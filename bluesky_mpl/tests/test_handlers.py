@@ -0,0 +1,82 @@
+import event_model
+import numpy
+
+from ..handlers import LazyStack, NpyFrameWiseHandler, NpyHandler
+from ..headless import HeadlessFigureDispatcher
+from ..heuristics.image import FrameReducer, latest_frame
+
+
+def counting_stack(frames, reads, describe=True):
+    def read_frame(i):
+        reads.append(i)
+        return frames[i]
+    if describe:
+        return LazyStack(read_frame, len(frames), frames.shape[1:], frames.dtype)
+    return LazyStack(read_frame, len(frames))
+
+
+def test_lazy_stack_reads_only_what_is_indexed():
+    frames = numpy.arange(5 * 2 * 3).reshape(5, 2, 3)
+    reads = []
+    stack = counting_stack(frames, reads, describe=False)
+    assert stack.shape == (5, 2, 3)  # reads frame 0 to find out
+    assert stack.ndim == 3
+    reads.clear()
+    numpy.testing.assert_array_equal(stack[-1], frames[-1])
+    numpy.testing.assert_array_equal(stack[1:3, 0], frames[1:3, 0])
+    assert reads == [4, 1, 2]
+    numpy.testing.assert_array_equal(numpy.asarray(stack), frames)
+
+
+def test_reducer_reads_lazy_data_in_chunks():
+    frames = numpy.ones((10, 4, 4), dtype='uint16')
+    reads = []
+    # A page of 3 Events, each with a lazy stack of 10 images
+    page = {'seq_num': [1, 2, 3],
+            'data': {'img': [counting_stack(frames, reads) for _ in range(3)]}}
+    frame = latest_frame(page, 'img')
+    numpy.testing.assert_array_equal(frame, 10 * frames[0])
+    assert len(reads) == 10  # only the last Event's stack
+    reads.clear()
+    frame = latest_frame(page, 'img', reducer=FrameReducer(page='max', chunk_size=4))
+    numpy.testing.assert_array_equal(frame, 10 * frames[0])
+    assert len(reads) == 30
+
+
+def test_npy_handlers(tmp_path):
+    frames = numpy.random.random((4, 3, 2))
+    path = str(tmp_path / 'frames.npy')
+    numpy.save(path, frames)
+    assert isinstance(NpyHandler(path)(), numpy.memmap)
+    handler = NpyFrameWiseHandler(path)
+    numpy.testing.assert_array_equal(handler(2), frames[2])
+    assert isinstance(handler(2), numpy.memmap)
+
+
+def test_filling_lazily_through_the_heuristics(tmp_path):
+    frames = numpy.random.random((3, 8, 6))
+    path = str(tmp_path / 'frames.npy')
+    numpy.save(path, frames)
+    dispatcher = HeadlessFigureDispatcher()
+    dispatcher.output_directory = None
+    router = event_model.RunRouter(
+        [dispatcher], handler_registry={'npy_FRAMEWISE': NpyFrameWiseHandler})
+    run = event_model.compose_run()
+    resource = run.compose_resource(spec='npy_FRAMEWISE', root='/', resource_path=path,
+                                    resource_kwargs={})
+    desc = run.compose_descriptor(
+        name='primary',
+        data_keys={'img': {'source': '', 'dtype': 'array', 'shape': [8, 6],
+                           'external': 'FILESTORE:'}},
+        object_keys={'det': ['img']})
+    router('start', run.start_doc)
+    router('descriptor', desc.descriptor_doc)
+    router('resource', resource.resource_doc)
+    for i in range(3):
+        datum = resource.compose_datum(datum_kwargs={'frame_no': i})
+        router('datum', datum)
+        router('event', desc.compose_event(data={'img': datum['datum_id']},
+                                           timestamps={'img': 0}, filled={'img': False}))
+    router('stop', run.compose_stop())
+    fig = dispatcher.figures[('image', 'img')]
+    numpy.testing.assert_array_equal(fig.axes[0].images[0].get_array(), frames[-1])
@@ -0,0 +1,45 @@
+import event_model
+import numpy
+
+from .. import utils
+from ..headless import HeadlessFigureDispatcher
+
+
+def test_headless_dispatcher_writes_pngs(tmp_path):
+    dispatcher = HeadlessFigureDispatcher(output_directory=str(tmp_path))
+    router = event_model.RunRouter([dispatcher])
+    run = event_model.compose_run(metadata={'motors': ['x'], 'num_points': 5})
+    data_keys = {'x': {'source': '', 'dtype': 'number', 'shape': []},
+                 'I': {'source': '', 'dtype': 'number', 'shape': []},
+                 'img': {'source': '', 'dtype': 'array', 'shape': [1, 4, 3]}}
+    desc = run.compose_descriptor(
+        name='primary', data_keys=data_keys,
+        object_keys={'x': ['x'], 'det': ['I', 'img']})
+    router('start', run.start_doc)
+    router('descriptor', desc.descriptor_doc)
+    for i in range(5):
+        router('event', desc.compose_event(
+            data={'x': i, 'I': i ** 2, 'img': numpy.full((1, 4, 3), i)},
+            timestamps={'x': 0, 'I': 0, 'img': 0}))
+    router('stop', run.compose_stop())
+
+    keys = set(dispatcher.figures)
+    assert ('line', 'x', ('I',)) in keys
+    assert ('image', 'img') in keys
+    for key in keys:
+        assert (tmp_path / dispatcher.filename(key)).exists()
+        rgba = dispatcher.snapshot(key)
+        assert rgba.ndim == 3 and rgba.shape[-1] == 4
+    line, = dispatcher.figures[('line', 'x', ('I',))].axes[0].lines
+    numpy.testing.assert_array_equal(line.get_ydata(), [0, 1, 4, 9, 16])
+
+
+def test_headless_snapshot_interval_can_be_changed(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / utils.CONFIG_FILE_NAME).write_text(
+        "c.HeadlessFigureDispatcher.snapshot_interval = 3\n")
+    utils.invalidate_config_cache()
+    dispatcher = HeadlessFigureDispatcher()
+    assert dispatcher._scheduler.interval == 3
+    dispatcher.snapshot_interval = 5
+    assert dispatcher._scheduler.interval == 5
@@ -0,0 +1,96 @@
+import functools
+
+import event_model
+from matplotlib.figure import Figure
+import numpy
+
+from ..artists.image import Image
+from ..heuristics.grid import GridPlotManager, positions_to_indices, seq_num_to_indices
+from ..heuristics.image import FrameReducer, first_frame, latest_frame
+
+
+class FigureManager:
+    "A stand-in for FigureDispatcher that makes Figures with no GUI."
+    def __init__(self):
+        self.figures = {}
+
+    def get_figure(self, key, label, *args, **kwargs):
+        if key not in self.figures:
+            fig = self.figures[key] = Figure()
+            fig.subplots()
+        return self.figures[key]
+
+
+def test_positions_to_indices():
+    indices = positions_to_indices([-1.02, -0.5, 0.01, 1.3], -1, 1, 5)
+    numpy.testing.assert_array_equal(indices, [0, 1, 2, 4])
+    # Reversed extents
+    numpy.testing.assert_array_equal(positions_to_indices([1, -1], 1, -1, 3), [0, 2])
+
+
+def test_seq_num_to_indices_snaking():
+    rows, cols = seq_num_to_indices([1, 2, 3, 4, 5, 6], (2, 3), (False, True))
+    numpy.testing.assert_array_equal(rows, [0, 0, 0, 1, 1, 1])
+    numpy.testing.assert_array_equal(cols, [0, 1, 2, 2, 1, 0])
+
+
+def test_grid_plot_manager():
+    dimensions = [(['y'], 'primary'), (['x'], 'primary')]
+    run = event_model.compose_run(metadata={
+        'shape': (2, 3), 'extents': ([0, 1], [-1, 1]), 'snaking': (False, True),
+        'hints': {'dimensions': dimensions}})
+    data_keys = {key: {'source': '', 'dtype': 'number', 'shape': []} for key in 'xyI'}
+    desc = run.compose_descriptor(
+        name='primary', data_keys=data_keys,
+        object_keys={'motors': ['x', 'y'], 'det': ['I']})
+    fig_manager = FigureManager()
+    rr = event_model.RunRouter([GridPlotManager(fig_manager, dimensions)])
+    rr('start', run.start_doc)
+    rr('descriptor', desc.descriptor_doc)
+    points = [(0, -1), (0, 0), (0, 1), (1, 1), (1, 0), (1, -1)]
+    for i, (y, x) in enumerate(points):
+        rr('event', desc.compose_event(data={'x': x, 'y': y, 'I': i},
+                                       timestamps={'x': 0, 'y': 0, 'I': 0}))
+    fig, = fig_manager.figures.values()
+    image, = fig.axes[0].images
+    numpy.testing.assert_array_equal(image.get_array(), [[0, 1, 2], [5, 4, 3]])
+
+
+def test_latest_frame_takes_last_event():
+    data = numpy.arange(3 * 2 * 2).reshape(3, 2, 2)
+    page = {'seq_num': [1, 2, 3], 'data': {'img': data}}
+    numpy.testing.assert_array_equal(latest_frame(page, 'img'), data[-1])
+    assert first_frame(page, 'img') is not None
+    numpy.testing.assert_array_equal(first_frame(page, 'img'), data[0])
+
+
+def test_frame_reducer():
+    stack = numpy.random.default_rng(0).integers(0, 4096, (5, 10, 4, 4), dtype='uint16')
+    reducer = FrameReducer(page='mean', stack='sum')
+    frame = reducer(stack)
+    assert frame.dtype == numpy.float64  # mean of uint64 sums
+    numpy.testing.assert_allclose(frame, stack.astype(float).sum(1).mean(0))
+    reducer = FrameReducer(page='max', stack='max')
+    frame = reducer(stack)
+    assert frame.dtype == numpy.uint16
+    numpy.testing.assert_array_equal(frame, stack.max(axis=(0, 1)))
+    # Each frame is a new array, not a reused buffer.
+    assert not numpy.shares_memory(reducer(stack), frame)
+    reducer = FrameReducer(page='mean', stack='last')
+    frame = reducer(stack)
+    assert frame.dtype == numpy.float32
+    numpy.testing.assert_allclose(frame, stack[:, -1].mean(0))
+    numpy.testing.assert_array_equal(FrameReducer()(stack), stack[-1].sum(0))
+
+
+def test_frames_computed_ahead_are_not_overwritten():
+    # As with offloading, compute several pages before applying any of them.
+    func = functools.partial(latest_frame, image_key='img', reducer=FrameReducer())
+    image = Image(func, (8, 8), lod=True, lod_min_size=2)
+    pages = [{'seq_num': [i + 1], 'data': {'img': numpy.full((1, 3, 8, 8), float(i))}}
+             for i in range(3)]
+    results = [image.compute_event_page(page) for page in pages]
+    for i, result in enumerate(results):
+        image.apply_event_page(result)
+        assert (image.frame == 3 * i).all()
+        assert (image.image.get_array() == 3 * i).all()
@@ -0,0 +1,101 @@
+from types import SimpleNamespace
+import threading
+
+import event_model
+import pytest
+
+from ..ingest import DocumentBatcher, DocumentQueue
+
+
+def make_run():
+    run = event_model.compose_run()
+    scalar = run.compose_descriptor(
+        name='primary', data_keys={'x': {'source': '', 'dtype': 'number', 'shape': []}})
+    image = run.compose_descriptor(
+        name='images', data_keys={'img': {'source': '', 'dtype': 'array', 'shape': [5, 5]}})
+    return run, scalar, image
+
+
+def test_drop_oldest_events_keeps_structural_documents():
+    run, scalar, _ = make_run()
+    queue = DocumentQueue(3, 'drop_oldest_events')
+    queue.put('start', run.start_doc)
+    queue.put('descriptor', scalar.descriptor_doc)
+    for x in range(5):
+        queue.put('event', scalar.compose_event(data={'x': x}, timestamps={'x': 0}))
+    queue.put('stop', run.compose_stop())
+    names = [name for name, doc in queue.get_batch()]
+    assert names == ['start', 'descriptor', 'stop']
+    assert queue.dropped == {'event': 5}
+
+
+def test_latest_image_keeps_only_newest_frame():
+    run, scalar, image = make_run()
+    queue = DocumentQueue(100, 'latest_image')
+    for desc in (scalar, image):
+        queue.put('descriptor', desc.descriptor_doc)
+    for i in range(3):
+        queue.put('event', image.compose_event(data={'img': i}, timestamps={'img': 0}))
+        queue.put('event', scalar.compose_event(data={'x': i}, timestamps={'x': 0}))
+    batch = queue.get_batch()
+    assert [doc['data'] for name, doc in batch[2:]] == [
+        {'x': 0}, {'x': 1}, {'img': 2}, {'x': 2}]
+    assert queue.dropped == {'event': 2}
+
+
+def test_block_waits_for_consumer():
+    queue = DocumentQueue(1, 'block')
+    queue.put('start', {})
+    thread = threading.Thread(target=queue.put, args=('stop', {}))
+    thread.start()
+    thread.join(0.1)
+    assert thread.is_alive()
+    assert queue.get_batch() == [('start', {})]
+    thread.join(1)
+    assert queue.get_batch() == [('stop', {})]
+    assert not queue.dropped
+
+
+def test_invalid_policy():
+    with pytest.raises(ValueError):
+        DocumentQueue(policy='drop_everything')
+
+
+class FakeLoop:
+    "Collects the calls scheduled with call_later, to run by hand."
+    def __init__(self):
+        self.scheduled = []  # [delay, func, cancelled]
+
+    def call_later(self, delay, func):
+        entry = [delay, func, False]
+        self.scheduled.append(entry)
+        return SimpleNamespace(cancel=lambda: entry.__setitem__(2, True))
+
+    def run_pending(self):
+        scheduled, self.scheduled = self.scheduled, []
+        for _, func, cancelled in scheduled:
+            if not cancelled:
+                func()
+
+
+def test_document_batcher():
+    loop = FakeLoop()
+    batches = []
+    batcher = DocumentBatcher(batches.append, 3, 0.5, call_later=loop.call_later)
+    docs = [('event', {'seq_num': i}) for i in range(5)]
+    # Flush on size, keeping the order
+    for name, doc in docs[:3]:
+        batcher(name, doc)
+    assert batches == [docs[:3]]
+    assert loop.scheduled[0][0] == 0.5
+    # The timer of a batch flushed on size does nothing.
+    loop.run_pending()
+    assert len(batches) == 1
+    # Flush on timeout
+    for name, doc in docs[3:]:
+        batcher(name, doc)
+    assert len(batches) == 1
+    loop.run_pending()
+    assert batches == [docs[:3], docs[3:]]
+    batcher.flush()
+    assert len(batches) == 2
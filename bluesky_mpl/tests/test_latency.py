@@ -0,0 +1,83 @@
+from types import SimpleNamespace
+import time
+
+import event_model
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+import numpy
+
+from .. import latency
+from ..artists.render import FigureRenderer
+from ..headless import HeadlessFigureDispatcher
+from ..latency import LatencyMonitor
+
+
+def test_monitor_histogram_and_summary():
+    monitor = LatencyMonitor(window=3, enabled=True)
+    now = 1000.
+    monitor.record('draw', [now - 0.01, now - 0.02], now=now)
+    monitor.record('draw', [now - 0.03, now - 0.04], now=now)
+    summary = monitor.summary('draw')
+    assert summary['count'] == 3  # limited by the window
+    assert numpy.isclose(summary['max'], 0.04)
+    counts, edges = monitor.histogram('draw')
+    assert counts.sum() == 4
+    assert len(edges) == len(counts) + 1
+    assert monitor.summary('receive')['count'] == 0
+
+
+def test_monitor_disabled():
+    monitor = LatencyMonitor()
+    monitor.record('draw', [0.])
+    assert monitor.summary('draw')['count'] == 0
+
+
+def test_headless_latency(monkeypatch):
+    monitor = LatencyMonitor(enabled=True)
+    monkeypatch.setattr(latency, 'monitor', monitor)
+    dispatcher = HeadlessFigureDispatcher()
+    dispatcher.output_directory = None
+    router = event_model.RunRouter([dispatcher])
+    run = event_model.compose_run(metadata={'motors': ['x']})
+    data_keys = {'x': {'source': '', 'dtype': 'number', 'shape': []},
+                 'I': {'source': '', 'dtype': 'number', 'shape': []}}
+    desc = run.compose_descriptor(name='primary', data_keys=data_keys,
+                                  object_keys={'x': ['x'], 'det': ['I']})
+    router('start', run.start_doc)
+    router('descriptor', desc.descriptor_doc)
+    for i in range(5):
+        event = desc.compose_event(data={'x': i, 'I': i}, timestamps={'x': 0, 'I': 0})
+        event['time'] = time.time() - 1
+        router('event', event)
+    router('stop', run.compose_stop())
+    summary = monitor.summary()
+    for stage in ('dispatch', 'update', 'draw'):
+        assert summary[stage]['count'] == 5
+        assert 1 <= summary[stage]['p50'] < 10
+
+
+def test_draw_latency_counts_each_document_once(monkeypatch):
+    monitor = LatencyMonitor(enabled=True)
+    monkeypatch.setattr(latency, 'monitor', monitor)
+    fig = Figure()
+    FigureCanvasAgg(fig)
+    renderer = FigureRenderer(fig)
+    scheduled = []
+    renderer.scheduler = SimpleNamespace(schedule=scheduled.append)
+    event = {'uid': 'a', 'time': time.time() - 1}
+    with monitor.updating('event', event):
+        # Several artists in one Figure update for the same Event.
+        for _ in range(3):
+            renderer.request_draw()
+    renderer.render()
+    fig.canvas.draw()
+    assert monitor.summary('draw')['count'] == 1
+
+    # A Figure that is never drawn remembers a limited number of documents.
+    renderer.max_pending_documents = 5
+    for i in range(20):
+        with monitor.updating('event', {'uid': str(i), 'time': time.time()}):
+            renderer.request_draw()
+    assert len(renderer._pending_times) == 5
+    fig.canvas.draw()
+    assert monitor.summary('draw')['count'] == 6
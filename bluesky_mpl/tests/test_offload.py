@@ -0,0 +1,110 @@
+import concurrent.futures
+import threading
+
+import event_model
+import pytest
+
+from .. import latency
+from ..latency import LatencyMonitor
+
+pytest.importorskip('qtpy.QtWidgets')
+from ..qt.offload import OffloadedCallback, UpdateTracker  # noqa: E402
+
+
+def on_gui_thread():
+    return threading.current_thread() is threading.main_thread()
+
+
+class Artist:
+    "Record where and in what order each phase runs."
+    def __init__(self):
+        self.applied = []  # (name, payload, on GUI thread)
+        self.computed = []  # (x, on GUI thread)
+        self.release = threading.Event()
+
+    def __call__(self, name, doc):
+        self.applied.append((name, None, on_gui_thread()))
+
+    def compute_event_page(self, doc):
+        self.release.wait(5)
+        self.computed.append((doc['data']['x'], on_gui_thread()))
+        return doc['data']['x']
+
+    def apply_event_page(self, result):
+        self.applied.append(('event_page', result, on_gui_thread()))
+
+
+@pytest.fixture
+def executor():
+    executor = concurrent.futures.ThreadPoolExecutor(2)
+    yield executor
+    executor.shutdown()
+
+
+def test_offloaded_callback(process_events, executor):
+    run = event_model.compose_run()
+    desc = run.compose_descriptor(
+        name='primary', data_keys={'x': {'source': '', 'dtype': 'number', 'shape': []}})
+    artist = Artist()
+    callback = OffloadedCallback(artist, executor)
+    assert callback.__wrapped__ is artist
+    callback('descriptor', desc.descriptor_doc)
+    for x in range(4):
+        # The first page is held up in the compute phase meanwhile.
+        callback('event', desc.compose_event(data={'x': x}, timestamps={'x': 0}))
+    callback('stop', run.compose_stop())
+    # Nothing is applied out of order while the first page is computed.
+    assert artist.applied == [('descriptor', None, True)]
+    artist.release.set()
+    assert process_events(lambda: len(artist.applied) == 4)
+    # Only one page was computed ahead of the GUI; the rest were merged.
+    assert artist.computed == [([0], False), ([1, 2, 3], False)]
+    assert artist.applied == [
+        ('descriptor', None, True),
+        ('event_page', [0], True),
+        ('event_page', [1, 2, 3], True),
+        ('stop', None, True)]
+
+
+def test_offloaded_callback_without_compute_phase(executor):
+    calls = []
+    callback = OffloadedCallback(lambda name, doc: calls.append(name), executor)
+    callback('event', {})
+    assert calls == ['event']
+
+
+def test_figure_dispatcher_shuts_down_its_workers(qapp):
+    from ..qt.figures import FigureDispatcher
+
+    dispatcher = FigureDispatcher(lambda tab, label: None)
+    dispatcher.offload_compute = True
+    run = event_model.compose_run()
+    dispatcher('start', run.start_doc)
+    executor = dispatcher._executor
+    assert executor is not None
+    dispatcher.close()
+    assert dispatcher._executor is None
+    with pytest.raises(RuntimeError):
+        executor.submit(print)
+
+
+def test_offloaded_update_latency_is_recorded_once_per_document(
+        process_events, executor, monkeypatch):
+    monitor = LatencyMonitor(enabled=True)
+    monkeypatch.setattr(latency, 'monitor', monitor)
+    run = event_model.compose_run()
+    desc = run.compose_descriptor(
+        name='primary', data_keys={'x': {'source': '', 'dtype': 'number', 'shape': []}})
+    tracker = UpdateTracker()
+    artists = [Artist() for _ in range(3)]
+    callbacks = [OffloadedCallback(artist, executor, tracker) for artist in artists]
+    for artist in artists:
+        artist.release.set()
+    for x in range(2):
+        event = desc.compose_event(data={'x': x}, timestamps={'x': 0})
+        # As FigureDispatcher routes each document to all the artists
+        with tracker.dispatching('event', event):
+            for callback in callbacks:
+                callback('event', event)
+    assert process_events(lambda: all(len(artist.applied) == 2 for artist in artists))
+    assert monitor.summary('update')['count'] == 2
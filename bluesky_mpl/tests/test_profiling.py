@@ -0,0 +1,60 @@
+import pytest
+
+from .. import profiling, utils
+from ..benchmarks import generate_documents
+from ..headless import HeadlessFigureDispatcher
+from ..profiling import CallbackProfiler
+
+import event_model
+
+
+def test_profiler_stats_and_report():
+    profiler = CallbackProfiler()
+    calls = []
+    wrapped = profiler.wrap(calls.append, label='append')
+    wrapped(1)
+    wrapped(2)
+    profiler.record(('slow', None), 10)
+    stats = profiler.stats()
+    assert calls == [1, 2]
+    assert [item['label'] for item in stats] == ['slow', 'append']
+    assert stats[1]['calls'] == 2
+    assert profiler.stats('calls')[0]['label'] == 'append'
+    assert 'slow' in profiler.report(limit=1)
+    assert 'append' not in profiler.report(limit=1)
+    with pytest.raises(ValueError):
+        profiler.stats('bogus')
+
+
+def test_headless_profiling(monkeypatch):
+    profiler = CallbackProfiler()
+    monkeypatch.setattr(profiling, 'profiler', profiler)
+    dispatcher = HeadlessFigureDispatcher()
+    dispatcher.output_directory = None
+    dispatcher.profile = True
+    router = event_model.RunRouter([dispatcher])
+    for name, doc in generate_documents('scalar', num_events=5):
+        router(name, doc)
+    stats = {(item['label'], item['figure_key']): item for item in profiler.stats()}
+    assert stats[('HeadlessFigureDispatcher', None)]['calls'] == 8
+    assert stats[('LinePlotManager', None)]['calls'] == 1
+    assert stats[('LinePlotManager.subfactory', None)]['calls'] == 1
+    # descriptor, 5 events and stop, plus start from newer event-model
+    assert stats[('Line', ('line', 'motor', ('det0',)))]['calls'] >= 7
+
+
+def test_profiler_looks_through_wrapped_factories():
+    class Manager:
+        def __call__(self, name, start_doc):
+            return [], [self.subfactory]
+
+        def subfactory(self, name, descriptor_doc):
+            return []
+
+    profiler = CallbackProfiler()
+    # As FigureDispatcher does with both offload_compute and profile on
+    factory = profiler.wrap_factory(utils.wrap_factory(Manager(), lambda callback: callback))
+    _, subfactories = factory('start', {})
+    subfactories[0]('descriptor', {})
+    labels = {item['label'].split('<locals>.')[-1] for item in profiler.stats()}
+    assert labels == {'Manager', 'Manager.subfactory'}
@@ -0,0 +1,98 @@
+import concurrent.futures
+import os
+
+import event_model
+
+from .. import utils
+
+
+def test_load_config_is_cached_until_the_file_changes(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    loads = []
+
+    class CountingLoader(utils.PyFileConfigLoader):
+        def load_config(self):
+            loads.append(self.filename)
+            return super().load_config()
+
+    monkeypatch.setattr(utils, 'PyFileConfigLoader', CountingLoader)
+    utils.invalidate_config_cache()
+    path = tmp_path / utils.CONFIG_FILE_NAME
+    assert utils.load_config() == {}
+
+    path.write_text("c.LinePlotManager.omit_single_point_plot = False\n")
+    config = utils.load_config()
+    assert config.LinePlotManager.omit_single_point_plot is False
+    utils.load_config()
+    assert len(loads) == 2
+    utils.reload_config()
+    assert len(loads) == 3
+    # Callers receive copies.
+    config.LinePlotManager.omit_single_point_plot = True
+    assert utils.load_config().LinePlotManager.omit_single_point_plot is False
+
+    # Modifying the file is noticed...
+    path.write_text("c.LinePlotManager.omit_single_point_plot = True\n")
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert utils.load_config().LinePlotManager.omit_single_point_plot is True
+    # ...and so is deleting it.
+    path.unlink()
+    assert utils.load_config() == {}
+    utils.invalidate_config_cache()
+
+
+def test_load_runs():
+    class Run:
+        def __init__(self, x):
+            self.x = x
+            self.run = event_model.compose_run()
+            self.desc = self.run.compose_descriptor(
+                name='primary', data_keys={'x': {'source': '', 'dtype': 'number', 'shape': []}})
+
+        def canonical(self, fill):
+            yield 'start', self.run.start_doc
+            yield 'descriptor', self.desc.descriptor_doc
+            for i in range(3):
+                yield 'event', self.desc.compose_event(data={'x': self.x}, timestamps={'x': 0})
+            yield 'stop', self.run.compose_stop()
+
+    class Broken:
+        def canonical(self, fill):
+            raise OSError("unreachable")
+
+    loaded = []
+    catalog = {'a': Run(1), 'b': Broken(), 'c': Run(2)}
+    futures = utils.load_runs(catalog, loaded.append, max_workers=2)
+    concurrent.futures.wait(futures)
+    assert isinstance(futures[1].exception(), OSError)
+    assert sorted(docs[2][1]['data']['x'] for docs in loaded) == [[1, 1, 1], [2, 2, 2]]
+    assert [name for name, _ in futures[0].result()] == [
+        'start', 'descriptor', 'event_page', 'stop']
+
+    futures = utils.load_runs([Run(3)], loaded.append, fast_forward=False)
+    assert [name for name, _ in futures[0].result()].count('event') == 3
+
+
+def test_wrap_factory():
+    def callback(name, doc):
+        pass
+
+    def subfactory(name, descriptor_doc):
+        return [callback]
+
+    def factory(name, start_doc):
+        return [callback], [subfactory]
+
+    wrapped = utils.wrap_factory(factory, lambda callback: ('wrapped', callback))
+    callbacks, subfactories = wrapped('start', {})
+    assert callbacks == [('wrapped', callback)]
+    assert subfactories[0]('descriptor', {}) == [('wrapped', callback)]
+
+
+def test_skip_start():
+    received = []
+    callback = utils.skip_start(lambda name, doc: received.append(name))
+    for name in ('start', 'descriptor', 'stop'):
+        callback(name, {})
+    assert received == ['descriptor', 'stop']
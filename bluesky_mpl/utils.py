@@ -1,18 +1,87 @@
+import concurrent.futures
+import copy
+import functools
+import logging
+import os
+import threading
+
 from traitlets import TraitType
 from traitlets.config.loader import (PyFileConfigLoader, ConfigFileNotFound,
                                      Config)
 
+from . import coalesce
+
+log = logging.getLogger('bluesky_mpl')
+
 CONFIG_FILE_NAME = 'bluesky_mpl_config.py'
 CONFIG_SEARCH_PATH = ('.')
 
+# The most recently loaded config and the (path, mtime, size) it came from
+_config_cache = {'key': None, 'config': None}
+_config_cache_lock = threading.Lock()
+
+
+def _config_file_key():
+    """
+    Locate the config file and identify its current version.
+
+    Returns None if there is no config file.
+    """
+    search_path = CONFIG_SEARCH_PATH
+    if isinstance(search_path, str):
+        search_path = (search_path,)
+    for directory in search_path:
+        path = os.path.abspath(os.path.join(directory, CONFIG_FILE_NAME))
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        return (path, stat.st_mtime_ns, stat.st_size)
+    return None
+
 
 def load_config():
-    loader = PyFileConfigLoader(CONFIG_FILE_NAME, CONFIG_SEARCH_PATH)
-    try:
-        config = loader.load_config()
-    except ConfigFileNotFound:
-        config = Config()
-    return config
+    """
+    Load the configuration from the config file, if any.
+
+    The result is cached for the whole process and the file is only executed
+    again if it has been created, deleted, or modified (judging by its
+    modification time and size) since it was last loaded. See
+    :func:`reload_config` and :func:`invalidate_config_cache`.
+
+    Returns
+    -------
+    config : traitlets.config.Config
+        A copy, which the caller is free to modify.
+    """
+    key = _config_file_key()
+    with _config_cache_lock:
+        if _config_cache['config'] is None or _config_cache['key'] != key:
+            loader = PyFileConfigLoader(CONFIG_FILE_NAME, CONFIG_SEARCH_PATH)
+            try:
+                config = loader.load_config()
+            except ConfigFileNotFound:
+                config = Config()
+            _config_cache['key'] = key
+            _config_cache['config'] = config
+        return copy.deepcopy(_config_cache['config'])
+
+
+def invalidate_config_cache():
+    """
+    Discard the cached configuration so that the next load reads the file.
+    """
+    with _config_cache_lock:
+        _config_cache['key'] = None
+        _config_cache['config'] = None
+
+
+def reload_config():
+    """
+    Re-read the config file, even if it appears unchanged, and return it.
+    """
+    invalidate_config_cache()
+    return load_config()
 
 
 class Callable(TraitType):
@@ -29,3 +98,129 @@ class Callable(TraitType):
             return value
         else:
             self.error(obj, value)
+
+
+def skip_start(callback):
+    """
+    Wrap a callback, made by a RunRouter factory, to ignore the start document.
+
+    For factories that send the start document to their callbacks themselves.
+    Newer versions of event-model's RunRouter also pass it along to the
+    callbacks a factory returns, and it must not be applied twice.
+
+    Parameters
+    ----------
+    callback : callable
+        Expected signature ``f(name, doc)``
+
+    Returns
+    -------
+    wrapped : callable
+    """
+    def wrapped(name, doc):
+        if name == 'start':
+            return
+        return callback(name, doc)
+
+    wrapped.__wrapped__ = callback
+    return wrapped
+
+
+def wrap_factory(factory, wrap):
+    """
+    Wrap every callback that a RunRouter factory (or its subfactories) makes.
+
+    Parameters
+    ----------
+    factory : callable
+        A RunRouter factory, with the signature ``f(name, start_doc)`` and
+        returning ``(callbacks, subfactories)``
+    wrap : callable
+        Expected signature ``wrap(callback) -> callback``
+
+    Returns
+    -------
+    wrapped_factory : callable
+        Its ``__wrapped__`` attribute, and that of the subfactories it makes,
+        is the original, so that ``inspect.unwrap`` can find it.
+    """
+    def wrapped_factory(name, start_doc):
+        callbacks, subfactories = factory(name, start_doc)
+        return ([wrap(callback) for callback in callbacks],
+                [_wrap_subfactory(subfactory, wrap) for subfactory in subfactories])
+
+    # Not functools.wraps, which would copy the __dict__ of a factory object.
+    wrapped_factory.__wrapped__ = factory
+    return wrapped_factory
+
+
+def _wrap_subfactory(subfactory, wrap):
+    def wrapped_subfactory(name, descriptor_doc):
+        return [wrap(callback) for callback in subfactory(name, descriptor_doc)]
+
+    wrapped_subfactory.__wrapped__ = subfactory
+    return wrapped_subfactory
+
+
+def load_runs(runs, callback, *, fill='delayed', fast_forward=True, max_workers=4):
+    """
+    Read the documents of many Runs concurrently, on a pool of worker threads.
+
+    Each Run's documents are read in full, and fast-forwarded (see
+    :func:`bluesky_mpl.coalesce.fast_forward`) if requested, on a worker
+    thread. Then ``callback`` is called, on that worker thread, with the list
+    of (name, doc) pairs. Runs are passed to ``callback`` in the order they
+    finish loading, which is not necessarily the order they were given in.
+
+    Parameters
+    ----------
+    runs : iterable or catalog
+        BlueskyRuns, or a catalog (such as a search result), in which case
+        each of its entries is looked up on a worker thread
+    callback : callable
+        Expected signature ``f(documents)``
+    fill : {'delayed', 'yes', 'no'}, optional
+        Passed to ``run.canonical``. Default is 'delayed'.
+    fast_forward : bool, optional
+        Default is True.
+    max_workers : int, optional
+        Number of Runs to read at once. Default is 4.
+
+    Returns
+    -------
+    futures : list
+        A ``concurrent.futures.Future`` for each Run, whose result is its list
+        of documents. Any error in loading a Run is logged and set on its
+        Future; the other Runs still load.
+    """
+    if hasattr(runs, 'keys'):
+        # Looking up an entry can itself be slow, so leave it to the workers.
+        getters = [functools.partial(runs.__getitem__, key) for key in list(runs.keys())]
+    else:
+        getters = [functools.partial(_identity, run) for run in runs]
+
+    def load(get_run):
+        documents = get_run().canonical(fill=fill)
+        if fast_forward:
+            documents = coalesce.fast_forward(documents)
+        documents = list(documents)
+        callback(documents)
+        return documents
+
+    executor = concurrent.futures.ThreadPoolExecutor(
+        max_workers, thread_name_prefix='bluesky_mpl-load')
+    futures = [executor.submit(load, get_run) for get_run in getters]
+    # The workers exit once the queue of Runs is empty.
+    executor.shutdown(wait=False)
+    for future in futures:
+        future.add_done_callback(_log_load_error)
+    return futures
+
+
+def _identity(obj):
+    return obj
+
+
+def _log_load_error(future):
+    if not future.cancelled() and future.exception() is not None:
+        log.error("Failed to load a Run", exc_info=future.exception())
@@ -4,25 +4,112 @@ from bluesky.callbacks.zmq import RemoteDispatcher
 from qtpy.QtCore import QThread
 from qtpy.QtCore import Signal
 
+from .ingest import DocumentBatcher, DocumentQueue
+from . import latency
 
 log = logging.getLogger('bluesky_mpl')
 
 
 class ConsumerThread(QThread):
+    """
+    Receive documents from a 0MQ Proxy and emit them to the GUI thread.
+
+    By default, each document is emitted on its own through the ``documents``
+    signal. If ``batch_size`` is given, documents are instead accumulated and
+    emitted together as a list of (name, doc) pairs through the
+    ``document_batch`` signal, once ``batch_size`` documents have accumulated
+    or ``batch_interval`` seconds have passed since the first of them arrived,
+    whichever comes first. This costs the GUI thread one wakeup per batch
+    instead of one per document. See :meth:`Viewers.add_documents`.
+
+    If ``max_queue_size`` is given, documents are instead put in a bounded
+    :class:`~bluesky_mpl.ingest.DocumentQueue`, which applies
+    ``drop_policy`` when the GUI falls behind. The ``documents_ready`` signal
+    is emitted when there are documents to collect with :meth:`drain`, but no
+    more than once until they are collected, so the Qt event queue holds at
+    most one notification however far behind the GUI is. For example:
+
+    >>> thread = ConsumerThread(zmq_address='localhost:5578', max_queue_size=10000,
+    ...                         drop_policy='drop_oldest_events')
+    >>> thread.documents_ready.connect(lambda: viewers.add_documents(thread.drain()))
+
+    Parameters
+    ----------
+    zmq_address : str or tuple
+        Address of the 0MQ Proxy, passed to bluesky's RemoteDispatcher
+    batch_size : int, optional
+        Maximum number of documents per batch. Default is None (no batching).
+    batch_interval : float, optional
+        Maximum time in seconds that a document waits in a batch. Default is
+        0.05.
+    max_queue_size : int, optional
+        Default is None (no queue).
+    drop_policy : {'block', 'drop_oldest_events', 'latest_image'}, optional
+        See :class:`~bluesky_mpl.ingest.DocumentQueue`. Default is 'block'.
+    """
     documents = Signal([tuple])
+    document_batch = Signal([list])
+    documents_ready = Signal()
     new_run_uid = Signal([str])
 
-    def __init__(self, *args, zmq_address, **kwargs):
+    def __init__(self, *args, zmq_address, batch_size=None, batch_interval=0.05,
+                 max_queue_size=None, drop_policy='block', **kwargs):
         super().__init__(*args, **kwargs)
         self.dispatcher = RemoteDispatcher(zmq_address)
+        self.batch_size = batch_size
+        self.batch_interval = batch_interval
+        if max_queue_size is None:
+            self.queue = None
+        else:
+            self.queue = DocumentQueue(max_queue_size, drop_policy)
+        self._ready_emitted = False
+        self._batcher = None
+        if batch_size is not None:
+            # This runs on the dispatcher's event loop.
+            self._batcher = DocumentBatcher(
+                self.document_batch.emit, batch_size, batch_interval,
+                call_later=lambda delay, func: self.dispatcher.loop.call_later(delay, func))
 
         def callback(name, doc):
+            latency.monitor.record_document('receive', name, doc)
             if name == 'start':
                 self.new_run_uid.emit(doc['uid'])
                 log.debug("New streaming Run: uid=%r", doc['uid'])
-            self.documents.emit((name, doc))
+            if self.queue is not None:
+                self.queue.put(name, doc)
+                if not self._ready_emitted:
+                    self._ready_emitted = True
+                    self.documents_ready.emit()
+            elif self.batch_size is None:
+                self.documents.emit((name, doc))
+            else:
+                self._batcher(name, doc)
 
         self.dispatcher.subscribe(callback)
 
+    def drain(self, max_items=None):
+        """
+        Collect the queued documents. Call this from the GUI thread.
+
+        Returns
+        -------
+        batch : list
+            A list of (name, doc) pairs
+        """
+        # Reset the flag first so that documents arriving from here on
+        # trigger a new notification.
+        self._ready_emitted = False
+        batch = self.queue.get_batch(max_items)
+        if len(self.queue):
+            # Some were left behind (max_items) so ask to be called again.
+            self._ready_emitted = True
+            self.documents_ready.emit()
+        return batch
+
+    @property
+    def dropped(self):
+        "Number of documents dropped from the queue so far, by document name"
+        return self.queue.dropped
+
     def run(self):
         self.dispatcher.start()
@@ -36,3 +36,6 @@ viewers.add_run(catalog[-2])
 viewer = viewers.add_viewer('Another tab')
 viewer.add_run(catalog[-3])
 viewers['Another tab'].add_run(catalog[-4])
+# Read many Runs at once, on worker threads, without blocking the window.
+viewer = viewers.add_viewer('All scans')
+viewer.add_runs(catalog.search({'plan_name': 'scan'}))